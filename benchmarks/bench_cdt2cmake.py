@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# Benchmarks for cdt2cmake.py on synthetic CDT (CCS) workspaces.
+#
+#   python benchmarks/bench_cdt2cmake.py --scale medium --output bench.json
+#   python benchmarks/bench_cdt2cmake.py --scale medium --compare bench.json
+#
+# Every phase is timed separately (best of --repeat runs) and written as JSON, so results of two
+# versions can be compared and scaling regressions show up before a release. The phase names stay the same
+# across versions, a phase needing an API the benchmarked version lacks is left out; --module benchmarks
+# another revision of cdt2cmake.py:
+#
+#   git show <rev>:cdt2cmake.py > /tmp/cdt2cmake_rev.py
+#   python benchmarks/bench_cdt2cmake.py --module /tmp/cdt2cmake_rev.py --output rev.json
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import inspect
+import argparse
+import platform
+import importlib.util
+import tempfile
+import statistics
+import xml.etree.ElementTree as elemTree
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import cdt2cmake  # noqa: E402
+
+SCALES = {
+    'small': dict(configs=2, fileinfos=20, linked=1, defines=10, includes=10, depth=2, dirs_per_level=2, files_per_dir=10),
+    'medium': dict(configs=8, fileinfos=500, linked=3, defines=50, includes=50, depth=3, dirs_per_level=4, files_per_dir=25),
+    'large': dict(configs=24, fileinfos=5000, linked=6, defines=200, includes=200, depth=4, dirs_per_level=5, files_per_dir=40),
+}
+
+TI_ID = 'com.ti.ccstudio.buildDefinitions'
+
+
+def _source_tree(root: Path, depth: int, dirs_per_level: int, files_per_dir: int, prefix: str) -> List[str]:
+    # a directory tree of .c/.asm/.h files plus one library per directory, returns the source paths relative to root
+    sources = []
+    level_dirs = [Path()]
+    for level in range(depth + 1):
+        next_dirs = []
+        for rel_dir in level_dirs:
+            (root / rel_dir).mkdir(parents=True, exist_ok=True)
+            for index in range(files_per_dir):
+                ext = '.asm' if index % 10 == 9 else '.c'
+                name = f'{prefix}_{index}{ext}'
+                (root / rel_dir / name).touch()
+                (root / rel_dir / f'{prefix}_{index}.h').touch()
+                sources.append((rel_dir / name).as_posix())
+            (root / rel_dir / f'{prefix}.lib').touch()
+            if level < depth:
+                next_dirs.extend(rel_dir / f'd{level}_{index}' for index in range(dirs_per_level))
+        level_dirs = next_dirs
+    return sources
+
+
+def _option(key: str, tool: str, value: str = None, values: List[str] = None, value_type: str = 'string') -> str:
+    option_id = f'{TI_ID}.{tool}.{key}.1'
+    if values is None:
+        return f'<option id="{option_id}" superClass="{TI_ID}.{tool}.{key}" value="{value}" valueType="{value_type}"/>'
+    items = ''.join(f'<listOptionValue builtIn="false" value="{item}"/>' for item in values)
+    return f'<option id="{option_id}" superClass="{TI_ID}.{tool}.{key}" valueType="{value_type}">{items}</option>'
+
+
+def _configuration(index: int, params: Dict, sources: List[str]) -> str:
+    family = 'C2000_18.1' if params['c2000'] else 'ARM_18.1'
+    platform_class = f'{TI_ID}.{family}.exe.targetPlatformDebug' if params['c2000'] else f'{TI_ID}.{family}.exe.platform'
+    name = f'CONFIG_{index}'
+    defines = [f'DEFINE_{index}_{n}={n}' for n in range(params['defines'])]
+    includes = ['${PROJECT_ROOT}', '${workspace_loc:/${ProjName}/src}', '${CG_TOOL_ROOT}/include']
+    includes += [f'${{PARENT-1-PROJECT_LOC}}/sdk{n % max(params["linked"], 1)}/inc{n}' for n in range(params['includes'])]
+    compiler = (_option('SILICON_VERSION', f'{family}.compilerID', f'{TI_ID}.{family}.compilerID.SILICON_VERSION.28')
+                + _option('LARGE_MEMORY_MODEL', f'{family}.compilerID', 'true')
+                + _option('OPT_LEVEL', f'{family}.compilerID', f'{TI_ID}.{family}.compilerID.OPT_LEVEL.{index % 5}')
+                + _option('INCLUDE_PATH', f'{family}.compilerID', values=includes, value_type='includePath')
+                + _option('DEFINE', f'{family}.compilerID', values=defines, value_type='definedSymbols'))
+    linker = (_option('STACK_SIZE', f'{family}.linkerID', '0x300')
+              + _option('LIBRARY', f'{family}.linkerID', values=['libc.a', '${PROJECT_ROOT}/extra.lib'], value_type='libs')
+              + _option('SEARCH_PATH', f'{family}.linkerID', values=['${CG_TOOL_ROOT}/lib'], value_type='libPaths'))
+    file_infos = []
+    for n in range(params['fileinfos']):
+        resource_path = f'src/{sources[n % len(sources)]}'
+        file_infos.append(
+            f'<fileInfo id="{name}.{n}" name="{Path(resource_path).name}" resourcePath="{resource_path}" toolsToInvoke="c.{n}">'
+            f'<tool id="{TI_ID}.{family}.exe.compilerDebug.{index}.{n}" superClass="{TI_ID}.{family}.exe.compilerDebug">'
+            + _option('DEFINE', f'{family}.compilerID', values=[f'FILE_{n % 7}=1'], value_type='definedSymbols')
+            + '</tool></fileInfo>')
+    return (
+        f'<cconfiguration id="{name}"><storageModule moduleId="cdtBuildSystem" version="4.0.0">'
+        f'<configuration artifactExtension="out" artifactName="${{ProjName}}" id="{name}" name="{name}">'
+        f'<folderInfo id="{name}." name="/" resourcePath="">'
+        f'<toolChain id="{name}.toolchain" superClass="{TI_ID}.{family}.exe.DebugToolchain">'
+        + _option('OPT_CODEGEN_VERSION', 'core', '18.1.4.LTS')
+        + f'<targetPlatform id="{name}.platform" superClass="{platform_class}"/>'
+        + f'<builder buildPath="${{BuildDirectory}}" id="{name}.builder"/>'
+        + f'<tool id="{TI_ID}.{family}.exe.compilerDebug.{index}" superClass="{TI_ID}.{family}.exe.compilerDebug">{compiler}</tool>'
+        + f'<tool id="{TI_ID}.{family}.exe.linkerDebug.{index}" superClass="{TI_ID}.{family}.exe.linkerDebug">{linker}</tool>'
+        + '</toolChain></folderInfo>'
+        + ''.join(file_infos)
+        + '<sourceEntries><entry excluding="src/d0_0|examples" flags="VALUE_WORKSPACE_PATH|RESOLVED" kind="sourcePath" name=""/></sourceEntries>'
+        + '</configuration></storageModule></cconfiguration>')
+
+
+def make_workspace(root: str, configs: int = 2, fileinfos: int = 20, linked: int = 1, defines: int = 10, includes: int = 10,
+                   depth: int = 2, dirs_per_level: int = 2, files_per_dir: int = 10, c2000: bool = True) -> str:
+    # synthetic workspace: <root>/proj (CDT project) and <root>/sdk<N> (linked resource folders), returns the project dir
+    params = dict(configs=configs, fileinfos=fileinfos, linked=linked, defines=defines, includes=includes,
+                  c2000=c2000)
+    project_dir = Path(root, 'proj')
+    sources = _source_tree(project_dir / 'src', depth, dirs_per_level, files_per_dir, 'src')
+    for n in range(linked):
+        _source_tree(Path(root, f'sdk{n}'), depth, dirs_per_level, files_per_dir, f'sdk{n}')
+    # build output that is pruned by the scanner
+    _source_tree(project_dir / 'Debug', 1, 1, files_per_dir, 'obj')
+
+    links = ''.join(
+        f'<link><name>sdk{n}</name><type>2</type><locationURI>PARENT-1-PROJECT_LOC/sdk{n}</locationURI></link>'
+        for n in range(linked))
+    (project_dir / '.project').write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n<projectDescription><name>proj</name><comment></comment>'
+        f'<projects></projects><buildSpec></buildSpec><natures></natures><linkedResources>{links}</linkedResources>'
+        '</projectDescription>\n')
+    cproject = elemTree.fromstring(
+        '<cproject storage_type_id="org.eclipse.cdt.core.XmlProjectDescriptionStorage">'
+        '<storageModule moduleId="org.eclipse.cdt.core.settings">'
+        + ''.join(_configuration(index, params, sources) for index in range(configs))
+        + '</storageModule></cproject>')
+    elemTree.indent(cproject, '\t')  # tab indented, as CCS writes it
+    (project_dir / '.cproject').write_text(
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n<?fileVersion 4.0.0?>'
+        + elemTree.tostring(cproject, encoding='unicode') + '\n')
+    return str(project_dir)
+
+
+def _time(func, repeat: int) -> Dict:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return dict(min=min(runs), median=statistics.median(runs), runs=runs)
+
+
+def load_module(path: str):
+    # another revision of cdt2cmake.py, imported under the same module name
+    spec = importlib.util.spec_from_file_location('cdt2cmake', path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['cdt2cmake'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _option_values(tool, key: str) -> List[str]:
+    # list option values of a Tool, or of the option dict of the versions before the slotted model
+    if isinstance(tool, dict):
+        values = tool.get(key)
+        return values if isinstance(values, list) else []
+    return list(tool.values(key))
+
+
+def _accepts(func, name: str) -> bool:
+    # whether func (a function or a class) takes the keyword argument name in the benchmarked version
+    try:
+        return name in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def run_benchmarks(project_dir: str, repeat: int) -> Dict:
+    phases = {}
+    counts = {}
+    # the names used before the public API
+    project_class = getattr(cdt2cmake, 'Project', None) or cdt2cmake.cdt_project
+    configuration_class = getattr(cdt2cmake, 'Configuration', None) or cdt2cmake.config_info
+
+    # streaming .cproject pass (parse and extract) of the first / every configuration, with each XML backend
+    # (ElementTree only before the backends could be selected, none before the streaming reader)
+    cproject_filepath = Path(project_dir, '.cproject')
+    for backend in ('etree', 'lxml') if hasattr(cdt2cmake, 'cproject_reader') else ():
+        if hasattr(cdt2cmake, 'set_xml_backend'):
+            try:
+                cdt2cmake.set_xml_backend(backend)
+            except ImportError:
+                continue
+        elif backend != 'etree':
+            continue
+        phases[f'cproject_read_first[{backend}]'] = _time(
+            lambda: cdt2cmake.cproject_reader(cproject_filepath).read(lambda config_name, config_index: config_index == 0), repeat)
+        phases[f'cproject_read_all[{backend}]'] = _time(
+            lambda: cdt2cmake.cproject_reader(cproject_filepath).read(lambda config_name, config_index: True), repeat)
+    counts['xml_backend'] = cdt2cmake.set_xml_backend('auto').name if hasattr(cdt2cmake, 'set_xml_backend') else 'etree'
+
+    # Project construction (.project, streaming .cproject pass, variables, linked resources)
+    phases['cdt_project'] = _time(lambda: project_class(project_dir), repeat)
+    # every configuration parsed up front (the versions without preload_configs parse them in the constructor)
+    if _accepts(project_class, 'preload_configs'):
+        cdt_prj = project_class(project_dir, preload_configs=True)
+    else:
+        cdt_prj = project_class(project_dir)
+    config_names = list(cdt_prj.configs.keys())
+    counts['configs'] = len(config_names)
+
+    # Configuration.parse of every configuration on an already parsed tree
+    if hasattr(cdt2cmake, 'get_xml_backend'):
+        cproject_xml = cdt2cmake.get_xml_backend().parse(cproject_filepath)
+    else:
+        cproject_xml = elemTree.parse(cproject_filepath)
+    config_nodes = cproject_xml.findall(".//storageModule[@moduleId='cdtBuildSystem']/configuration[@name]")
+    phases['config_info.parse'] = _time(lambda: [configuration_class(node) for node in config_nodes], repeat)
+
+    # get_src_files/get_lib_files with a cold directory index
+    config = cdt_prj.configs[config_names[0]]
+
+    def scan():
+        generator = cmake_generator_for(cdt_prj, config)
+        return generator.get_src_files(config, cdt_prj.PROJECT_NAME), generator.get_lib_files(config, cdt_prj.PROJECT_NAME)
+    phases['scan'] = _time(scan, repeat)
+    src_files, lib_files = scan()
+
+    # the same with the linked folders listed from a shared scan index, already walked in this run (another project)
+    if hasattr(cdt2cmake, 'open_scan_index'):
+        with tempfile.TemporaryDirectory(prefix='cdt2cmake-scan-index-') as index_dir:
+            shared_index = cdt2cmake.open_scan_index(index_dir)
+
+            def shared_scan():
+                generator = cmake_generator_for(cdt_prj, config)
+                generator.set_shared_index(shared_index)
+                return generator.get_src_files(config, cdt_prj.PROJECT_NAME), generator.get_lib_files(config, cdt_prj.PROJECT_NAME)
+            shared_scan()
+            phases['scan[shared_index]'] = _time(shared_scan, repeat)
+    counts['src_files'] = len(src_files)
+    counts['lib_files'] = len(lib_files)
+
+    # expand_variable over every path and option value, with an empty memo
+    texts = list(src_files) + list(lib_files)
+    for config_name in config_names:
+        for tool in cdt_prj.configs[config_name]['config_info'].COMPILER_OPTIONS.values():
+            for key in ('DEFINE', 'INCLUDE_PATH'):
+                texts.extend(_option_values(tool, key))
+    counts['expanded_strings'] = len(texts)
+
+    def expand():
+        cdt_prj.expand_cache = {}
+        for text in texts:
+            cdt_prj.expand_variable(text)
+    phases['expand_variable'] = _time(expand, repeat)
+
+    # cmake_generator.generate of the first configuration (scan already warm) and of all configurations
+    generator = cmake_generator_for(cdt_prj)
+    generator.generate(config_names[0], io.StringIO())
+    phases['generate'] = _time(lambda: generator.generate(config_names[0], io.StringIO()), repeat)
+    if hasattr(cdt2cmake.cmake_generator, 'generate_all'):
+        jobs = dict(jobs=1) if _accepts(cdt2cmake.cmake_generator.generate_all, 'jobs') else {}
+        phases['generate_all'] = _time(
+            lambda: cmake_generator_for(cdt_prj).generate_all(config_names, io.StringIO(), **jobs), repeat)
+    return dict(phases=phases, counts=counts)
+
+
+def cmake_generator_for(cdt_prj, config: Dict = None) -> 'cdt2cmake.cmake_generator':
+    generator = cdt2cmake.cmake_generator(cdt_prj)
+    generator.set_gen_target_dir(cdt_prj.PROJECT_DIR)
+    if config is not None and hasattr(generator, 'gether_vaiable'):
+        generator.gether_vaiable(config)  # the versions whose generator variables were only set by generate()
+    return generator
+
+
+def compare(result: Dict, baseline: Dict, max_ratio: float) -> int:
+    # print min time ratios against a previous result, returns the number of phases slower than max_ratio
+    regressions = 0
+    for phase, timing in result['phases'].items():
+        base = baseline.get('phases', {}).get(phase)
+        if base is None:
+            print(f"{phase:20s} not measured by the baseline")
+            continue
+        if base['min'] <= 0:
+            continue
+        ratio = timing['min'] / base['min']
+        flag = ''
+        if ratio > max_ratio:
+            regressions += 1
+            flag = '  REGRESSION'
+        print(f"{phase:20s} {base['min'] * 1000:10.2f} ms -> {timing['min'] * 1000:10.2f} ms  x{ratio:.2f}{flag}")
+    for phase in baseline.get('phases', {}).keys():
+        if phase not in result['phases']:
+            print(f"{phase:20s} not measured by this version")
+    return regressions
+
+
+def main() -> int:
+    global cdt2cmake
+    parser = argparse.ArgumentParser(description='Benchmark cdt2cmake.py on a synthetic CDT workspace.')
+    parser.add_argument('--scale', choices=sorted(SCALES.keys()), default='small')
+    for key in SCALES['small'].keys():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=None, dest=key,
+                            help=f'override the {key} of --scale')
+    parser.add_argument('--non-c2000', action='store_true', help='generate a non-C2000 (ARM) target')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per phase (best and median are reported)')
+    parser.add_argument('--module', metavar='FILE',
+                        help='benchmark this cdt2cmake.py (e.g. an older revision) instead of the one of the repository')
+    parser.add_argument('--workspace', metavar='DIR', help='keep the synthetic workspace in DIR instead of a temp dir')
+    parser.add_argument('--output', metavar='FILE', help='write the JSON result to FILE (default: stdout)')
+    parser.add_argument('--compare', metavar='FILE', help='compare against a previous JSON result')
+    parser.add_argument('--max-ratio', type=float, default=1.5,
+                        help='with --compare: exit non-zero when a phase is slower by more than this factor')
+    args = parser.parse_args()
+    if args.module:
+        cdt2cmake = load_module(args.module)
+
+    params = dict(SCALES[args.scale])
+    for key in params.keys():
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    params['c2000'] = not args.non_c2000
+
+    workspace_dir = args.workspace or tempfile.mkdtemp(prefix='cdt2cmake-bench-')
+    try:
+        start = time.perf_counter()
+        project_dir = make_workspace(workspace_dir, **params)
+        setup_time = time.perf_counter() - start
+        result = dict(version=cdt2cmake.__version__, python=platform.python_version(), platform=platform.platform(),
+                      scale=args.scale, params=params, repeat=args.repeat, workspace_setup=setup_time)
+        result.update(run_benchmarks(os.path.relpath(project_dir), args.repeat))
+    finally:
+        if args.workspace is None:
+            shutil.rmtree(workspace_dir, ignore_errors=True)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    elif args.compare is None:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        return 1 if compare(result, baseline, args.max_ratio) > 0 else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
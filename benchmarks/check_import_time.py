@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Import time budget for cdt2cmake.py.
+#
+#   python benchmarks/check_import_time.py
+#   python benchmarks/check_import_time.py --budget-ms 30 --repeat 10
+#
+# Runs `python -X importtime -c "import cdt2cmake"` (best of --repeat) and exits non-zero when the
+# cumulative import time is over budget, or when a module that only some runs need (XML parsers,
+# pickle, argparse, ...) is imported eagerly again.
+
+import os
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# imported by the functions that need them, never by `import cdt2cmake`
+LAZY_MODULES = ('lxml', 'xml.etree.ElementTree', 'pickle', 'hashlib', 'json', 'argparse', 'cProfile',
+                'concurrent.futures', 'typing')
+
+
+def import_times() -> Dict[str, Tuple[int, int]]:
+    # module name -> (self, cumulative) import time in microseconds, of cdt2cmake and the modules it imports
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)  # measure with cached bytecode, as an installed module would run
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import cdt2cmake'], cwd=ROOT_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+        if not name.startswith('  '):
+            # a top level import is reported after the modules it imported
+            if name.strip() == 'cdt2cmake':
+                return times
+            times = {}
+    raise RuntimeError(f'no import time reported for cdt2cmake:\n{proc.stderr}')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Check the import time of cdt2cmake.py against a budget.')
+    parser.add_argument('--budget-ms', type=float, default=40.0,
+                        help='maximum cumulative import time of cdt2cmake in milliseconds (default: 40)')
+    parser.add_argument('--repeat', type=int, default=5, help='imports measured, the best one is checked')
+    args = parser.parse_args()
+
+    import_times()  # warm up: writes __pycache__ and fills the OS file cache
+    runs = [import_times() for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times['cdt2cmake'][1])
+    total_ms = best['cdt2cmake'][1] / 1000
+
+    failures = []
+    eager = sorted(name for name in best if name.split('.')[0] == 'lxml' or name in LAZY_MODULES)
+    if len(eager) > 0:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f'import time {total_ms:.1f} ms is over the budget of {args.budget_ms:.1f} ms')
+
+    slowest = sorted(((times[1], name) for name, times in best.items() if name != 'cdt2cmake'), reverse=True)[:5]
+    print(f'import cdt2cmake: {total_ms:.1f} ms (budget {args.budget_ms:.1f} ms)')
+    for cumulative_us, name in slowest:
+        print(f'  {name:<30} {cumulative_us / 1000:>8.1f} ms')
+    for failure in failures:
+        print(f'FAILED {failure}')
+    return 1 if len(failures) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,19 +1,152 @@
 #!/usr/bin/env python3
 
+from __future__ import annotations
+
 import io
 import os
+import re
 import sys
-from typing import List, Set, Tuple, Dict
-import xml.etree.ElementTree as elemTree
-from lxml import objectify
+import time
+import fnmatch
+import functools
+import threading
+import contextlib
+from collections.abc import Mapping
 from pathlib import Path
 
+# annotations are not evaluated at run time (see __future__ above): typing is only needed by type checkers,
+# and XML parsers, pickle, hashlib, concurrent.futures, argparse, json ... are imported where they are used
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Set, Tuple, Dict
+
 __version__ = "0.0.6"
 
+SRC_FILE_EXTS = ('.c', '.cla', '.asm')
+LIB_FILE_EXTS = ('.a', '.lib')
+CMD_FILE_EXT = '.cmd'  # linker command files (C2000 only)
+SCAN_FILE_EXTS = SRC_FILE_EXTS + LIB_FILE_EXTS + (CMD_FILE_EXT, )
+
+# directories never walked into (vcs, IDE metadata, CMake build trees)
+IGNORE_DIR_NAMES = ('.git', '.svn', '.hg', '.settings', '.launches', '.metadata', 'CMakeFiles', '.cdt2cmake-cache')
+# TI compiler options a fileInfo may override per source file (--<key>=<value>)
+C2000_FILE_OPTION_KEYS = ('OPT_LEVEL', 'OPT_FOR_SPEED', 'FP_MODE', 'FLOAT_SUPPORT', 'CLA_SUPPORT', 'VCU_SUPPORT',
+                          'TMU_SUPPORT', 'LARGE_MEMORY_MODEL', 'UNIFIED_MEMORY', 'CLA_SIGNED_COMPARE_WORKAROUND')
+# sources a unity (jumbo) build may batch together
+UNITY_FILE_EXTS = ('.c', '.cpp', '.cc', '.cxx')
+# Ninja job pool serializing the links of TI targets (shared by every generated project)
+TI_LINK_JOB_POOL = 'cdt2cmake_ti_link'
+# compile_commands.json compiler of TI targets, by the target platform family in the superClass
+TI_COMPILERS = (('C2000', 'cl2000'), ('MSP430', 'cl430'), ('TMS470', 'armcl'), ('ARM', 'armcl'), ('C6000', 'cl6x'))
+COMPILE_COMMANDS_FILENAME = 'compile_commands.json'
+# --config-layout fragments: <FRAGMENTS_DIR_NAME>/<config>/<section>.cmake, the prologue (before project()) and
+# BODY_SECTIONS of each configuration, included by a CMakeLists.txt that only changes with the configuration list
+FRAGMENTS_DIR_NAME = 'cdt2cmake'
+BODY_SECTIONS = ('sources', 'definitions', 'includes', 'link', 'properties')
+FRAGMENT_SECTIONS = ('prologue', ) + BODY_SECTIONS
+# write buffer of the generated files, which are rendered straight into them
+OUTPUT_BUFFER_SIZE = 256 * 1024
+# default CDT/CCS build output folders, not searched for nested projects by find_cdt_projects (the scan only
+# prunes the build folders of the generated configuration, see cmake_generator.get_build_dirs)
+BUILD_DIR_NAMES = ('Debug', 'Release')
+
 def debug_print(msg, *args):
     return  # print(msg, *args)
 
 
+class run_stats:
+    # wall time per phase (exclusive: a nested phase is not counted again in its parent) and event counters,
+    # reported by --timings; recording is off (and costs a flag test) unless enabled
+    PHASES = ('xml_parse', 'config_parse', 'variable_setup', 'directory_scan', 'scan_index', 'expansion', 'render',
+              'write', 'cache')
+    COUNTERS = ('dirs_visited', 'dirs_listed', 'files_considered', 'files_kept', 'expand_calls', 'expand_cache_hits',
+                'scan_index_hits', 'scan_index_walks')
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.local = threading.local()  # per thread stack of [phase name, start time, time of nested phases]
+        self.reset()
+
+    def reset(self) -> None:
+        self.timings = {}   # phase name -> [calls, seconds]
+        self.counters = {}  # counter name -> value
+        self.wall_time = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        stack = self.local.__dict__.setdefault('stack', [])
+        frame = [name, time.perf_counter(), 0.0]
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - frame[1]
+            stack.pop()
+            if len(stack) > 0:
+                stack[-1][2] += elapsed
+            with self.lock:
+                timing = self.timings.setdefault(name, [0, 0.0])
+                timing[0] += 1
+                timing[1] += elapsed - frame[2]
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, stats: Dict) -> None:
+        # add the as_dict() of another run (a workspace worker process)
+        with self.lock:
+            for name, timing in stats['timings'].items():
+                total = self.timings.setdefault(name, [0, 0.0])
+                total[0] += timing['calls']
+                total[1] += timing['seconds']
+            for name, value in stats['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self) -> Dict:
+        names = [name for name in self.PHASES if name in self.timings]
+        names += sorted(name for name in self.timings if name not in self.PHASES)
+        counter_names = [name for name in self.COUNTERS if name in self.counters]
+        counter_names += sorted(name for name in self.counters if name not in self.COUNTERS)
+        return {
+            'wall_time': self.wall_time,
+            'timings': {name: {'calls': self.timings[name][0], 'seconds': self.timings[name][1]} for name in names},
+            'counters': {name: self.counters[name] for name in counter_names},
+        }
+
+    def report(self, outfile) -> None:
+        stats = self.as_dict()
+        outfile.write(f"{'phase':<20} {'calls':>10} {'seconds':>10}\n")
+        for name, timing in stats['timings'].items():
+            outfile.write(f"{name:<20} {timing['calls']:>10} {timing['seconds']:>10.3f}\n")
+        if stats['wall_time'] is not None:
+            outfile.write(f"{'(wall time)':<20} {'':>10} {stats['wall_time']:>10.3f}\n")
+        outfile.write(f"{'counter':<20} {'value':>10}\n")
+        for name, value in stats['counters'].items():
+            outfile.write(f"{name:<20} {value:>10}\n")
+
+
+STATS = run_stats()
+
+
+def timed(phase_name: str):
+    # decorator recording the calls of a function as phase_name in STATS
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not STATS.enabled:
+                return func(*args, **kwargs)
+            with STATS.phase(phase_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
 def unquote_path(path: str) -> str:
     path = str(path)
     if path[0] == '"' and path[-1] == '"' and path.count('"') == 2:
@@ -29,197 +162,561 @@ def quote_path(path: str, force=False) -> str:
 
 
 def norm_path(pathstr: str) -> str:
+    # interned: the same paths recur in every configuration (and every project of a workspace)
     path = Path(pathstr).as_posix()
     if path[0] == '"' and path[-1] == '"' and path.count('"') == 2 and ' ' not in path:
         path = path[1:-1]
-    return path
+    return sys.intern(path)
+
+
+class xml_backend:
+    # the XML parser of .project/.cproject: xml.etree.ElementTree by default, lxml.etree on request
+    # (set_xml_backend('lxml')); created on first use, `import cdt2cmake` loads neither of them
+    QUERIES = {  # element paths, relative to the node they are applied to and valid for both parsers
+        'folder_tool_chain': 'folderInfo[1]/toolChain[1]',
+        'target_platform': 'targetPlatform[1]',
+        'builder': 'builder[1]',
+        'tools': 'tool',
+        'options': 'option',
+        'list_values': 'listOptionValue',
+        'file_infos': 'fileInfo',
+        'source_entries': 'sourceEntries/entry',
+    }
+
+    def __init__(self, name: str, etree):
+        self.name = name  # 'lxml' or 'etree'
+        self.etree = etree
+        for query_name, path in self.QUERIES.items():
+            if name != 'lxml':
+                query = (lambda node, path=path: node.findall(path))
+            elif '/' in path or '[' in path:
+                query = etree.XPath(path)  # compiled once: only the paths run once per configuration
+            else:
+                # direct children by tag: a per node XPath evaluation costs more than the lookup itself
+                query = (lambda node, tag=path: list(node.iterchildren(tag)))
+            setattr(self, query_name, query)  # query(node) -> [matching elements]
+
+    def parse(self, path):
+        if self.name == 'lxml':
+            return self.etree.parse(str(path), self.etree.XMLParser(remove_blank_text=True, resolve_entities=False))
+        return self.etree.parse(path)
+
+    @staticmethod
+    def first(nodes):
+        return nodes[0] if len(nodes) > 0 else None
+
+
+_XML_BACKEND = None
+
+
+def get_xml_backend() -> xml_backend:
+    if _XML_BACKEND is None:
+        return set_xml_backend('auto')
+    return _XML_BACKEND
+
+
+def set_xml_backend(name: str = 'auto') -> xml_backend:
+    # 'lxml', 'etree' or 'auto' (etree: lxml only parses faster when a single configuration is read,
+    # the proxy elements make reading every configuration slower); parsed elements only work with the
+    # backend that parsed them
+    global _XML_BACKEND
+    if name not in ('auto', 'lxml', 'etree'):
+        raise ValueError(f'unknown XML backend {name} (available: auto, lxml, etree)')
+    if name == 'lxml':
+        from lxml import etree
+        _XML_BACKEND = xml_backend('lxml', etree)
+        return _XML_BACKEND
+    import xml.etree.ElementTree as etree
+    _XML_BACKEND = xml_backend('etree', etree)
+    return _XML_BACKEND
+
+
+def get_project_references(project_xml, cproject_references: List[str] = None) -> List[str]:
+    references = []
+    for project_node in project_xml.findall('./projects/project'):
+        if project_node.text and project_node.text.strip() not in references:
+            references.append(project_node.text.strip())
+    for project_name in (cproject_references or []):
+        if project_name not in references:
+            references.append(project_name)
+    return references
+
+
+def read_project_name(PROJECT_DIR: str) -> str:
+    # the name in .project alone (of a project that could not be loaded), or None
+    try:
+        return get_xml_backend().parse(Path(PROJECT_DIR, ".project")).find("./name").text.strip()
+    except Exception:
+        return None
+
+
+def read_config_names(PROJECT_DIR: str) -> List[str]:
+    # the configuration names in .cproject, without parsing the configurations ([] when it cannot be read)
+    try:
+        return list(cproject_reader(str(Path(PROJECT_DIR, '.cproject'))).read().config_attribs.keys())
+    except Exception:
+        return []
+
+
+class slotted:
+    # base of the compact model classes: __slots__ instead of a per instance __dict__, with the repr and
+    # equality of a dataclass (the dataclasses module itself would import inspect and double the import time)
+    __slots__ = ()
+    _derived_slots = ()  # caches and state derived from the other slots: not part of the equality
+
+    def _value_slots(self):
+        return [name for name in self.__slots__ if name not in self._derived_slots]
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._value_slots())
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class Option(slotted):
+    # <option> of a tool: the value of a single valued option, or the listOptionValue values of a list option
+    __slots__ = ('key', 'value', 'values')
+
+    def __init__(self, key: str, value: str = None, values: Tuple[str, ...] = ()):
+        self.key = key        # second to last part of the option id, e.g. DEFINE for ...compilerID.DEFINE.1234
+        self.value = value
+        self.values = values
+
+    @classmethod
+    def parse(cls, option_node, xml: 'xml_backend' = None) -> 'Option':
+        key = sys.intern(option_node.get('id').split('.')[-2])
+        value = option_node.get('value')
+        if value:
+            return cls(key, sys.intern(value))
+        xml = xml or get_xml_backend()
+        return cls(key, None, tuple(sys.intern(listoptval.get('value')) for listoptval in xml.list_values(option_node)))
+
+
+class Tool(slotted):
+    # <tool> (or <toolChain>) options by key, every option stored once
+    __slots__ = ('id', 'options')
+
+    def __init__(self, tool_id: str, options: Dict[str, Option] = None):
+        self.id = tool_id
+        self.options = options if options is not None else {}
+
+    @classmethod
+    def parse(cls, tool_node, xml: 'xml_backend' = None) -> 'Tool':
+        xml = xml or get_xml_backend()
+        tool = cls(sys.intern(tool_node.get('id', '')))
+        for option_node in xml.options(tool_node):
+            option = Option.parse(option_node, xml)
+            tool.options[option.key] = option
+        return tool
+
+    def get(self, key: str, default=None):
+        # the value of a single valued option, the values of a list option
+        option = self.options.get(key)
+        if option is None:
+            return default
+        return option.value if option.value else option.values
+
+    def values(self, key: str) -> Tuple[str, ...]:
+        # the values of a list option, () for a single valued or missing option
+        option = self.options.get(key)
+        return option.values if option is not None else ()
+
+
+class Element(slotted):
+    # the attributes of a <toolChain>, <targetPlatform> or <builder> element
+    __slots__ = ('id', 'superClass', 'attrib')
+
+    def __init__(self, attrib: Dict[str, str] = None):
+        self.attrib = dict(attrib) if attrib else {}
+        self.id = self.attrib.get('id')
+        self.superClass = self.attrib.get('superClass')
+
+    def get(self, key: str, default=None):
+        return self.attrib.get(key, default)
+
+
+class FileInfo(slotted):
+    # a <fileInfo> of a configuration: the tool options overridden for a single resource
+    __slots__ = ('resource_path', 'attrib', 'COMPILER_OPTIONS', 'LINKER_OPTIONS')
+
+    def __init__(self, resource_path: str, attrib: Dict[str, str] = None, compiler_options: Dict[str, Tool] = None,
+                 linker_options: Dict[str, Tool] = None):
+        self.resource_path = resource_path
+        self.attrib = attrib if attrib is not None else {}
+        self.COMPILER_OPTIONS = compiler_options if compiler_options is not None else {}  # tool id -> Tool
+        self.LINKER_OPTIONS = linker_options if linker_options is not None else {}
+
+
+class ExcludeInfo(slotted):
+    # an <entry> of <sourceEntries>: a source folder and the paths excluded below it
+    __slots__ = ('name', 'flags', 'kind', 'exclude_item_list')
 
+    def __init__(self, name: str = '', flags: str = None, kind: str = None, exclude_item_list: List[str] = None):
+        self.name = name
+        self.flags = flags
+        self.kind = kind
+        self.exclude_item_list = exclude_item_list if exclude_item_list is not None else []
+
+    @classmethod
+    def parse(cls, entry_node) -> 'ExcludeInfo':
+        return cls(entry_node.get('name', ''), entry_node.get('flags'), entry_node.get('kind'),
+                   entry_node.get('excluding', '').replace(';', '|').split('|'))
+
+
+class Configuration(slotted):
+    # a parsed <configuration> of the cdtBuildSystem module of .cproject
+    __slots__ = ('name', 'toolChain', 'OPT_CODEGEN_VERSION', 'OPT_TAGS', 'TOOLCHAIN_OPTIONS', 'TARGETPLATFORM', 'BUILDER',
+                 'COMPILER_OPTIONS', 'LINKER_OPTIONS', 'HEX_OPTIONS', 'FILEINFO', 'EXCLUDE_INFO')
 
-class config_info:
     def __init__(self, node=None):
+        self.name = None
+        self.toolChain = Element()
         self.OPT_CODEGEN_VERSION = {}
         self.OPT_TAGS = {}
-        self.COMPILER_OPTIONS = {}
+        self.TOOLCHAIN_OPTIONS = Tool('')
+        self.TARGETPLATFORM = Element()
+        self.BUILDER = Element()
+        self.COMPILER_OPTIONS = {}  # tool id -> Tool
         self.LINKER_OPTIONS = {}
         self.HEX_OPTIONS = {}
-        if node:
+        self.FILEINFO = {}  # resource path -> FileInfo
+        self.EXCLUDE_INFO = []  # ExcludeInfo of the sourceEntries
+        if node is not None:
             self.parse(node)
 
+    @timed('config_parse')
     def parse(self, config_node):
-        self.name = config_node.attrib['name']
-        folderInfo = config_node.find('.//folderInfo')
+        # <fileInfo> children already handed to parse_file_info() (streaming reader) are kept
+        xml = get_xml_backend()
+        self.name = config_node.get('name')
 
-        toolChain = folderInfo.find('.//toolChain')
-        if toolChain:
-            self.toolChain = {k:v for k,v in toolChain.attrib.items()}  # copy atributes
+        toolChain = xml.first(xml.folder_tool_chain(config_node))
+        if toolChain is not None and len(toolChain) > 0:
+            self.toolChain = Element(toolChain.attrib)
 
             # parse toolChain/option
-            for option in toolChain.findall('./option'):
-                if "OPT_CODEGEN_VERSION" in option.attrib['id']:
-                    self.OPT_CODEGEN_VERSION[option.attrib['id']] = option.attrib['value']
+            for option in xml.options(toolChain):
+                if "OPT_CODEGEN_VERSION" in option.get('id'):
+                    self.OPT_CODEGEN_VERSION[option.get('id')] = option.get('value')
                     debug_print("** self.OPT_CODEGEN_VERSION:", self.OPT_CODEGEN_VERSION)
-                if "OPT_TAGS" in option.attrib['id']:
-                    for listoptval in option.findall('listOptionValue'):
-                        items = listoptval.attrib['value'].split('=')
+                if "OPT_TAGS" in option.get('id'):
+                    for listoptval in xml.list_values(option):
+                        items = listoptval.get('value').split('=')
                         self.OPT_TAGS[items[0]] = items[1]
                     debug_print("** self.OPT_TAGS:", self.OPT_TAGS)
 
-            self.TOOLCHAIN_OPTIONS = self.parse_tool_options(toolChain)
+            self.TOOLCHAIN_OPTIONS = self.parse_tool_options(toolChain, xml)
             debug_print("** self.TOOLCHAIN_OPTIONS:", self.TOOLCHAIN_OPTIONS)
 
-            targetPlatform = toolChain.find('./targetPlatform')
-            self.TARGETPLATFORM = {k:v for k,v in targetPlatform.attrib.items()}  # copy atributes
+            targetPlatform = xml.first(xml.target_platform(toolChain))
+            self.TARGETPLATFORM = Element(targetPlatform.attrib)
             debug_print("** self.TARGETPLATFORM:", self.TARGETPLATFORM)
 
+            builder = xml.first(xml.builder(toolChain))
+            if builder is not None:
+                self.BUILDER = Element(builder.attrib)
+                debug_print("** self.BUILDER:", self.BUILDER)
+
             # parse toolChain/tool
-            for tool in toolChain.findall('./tool'):
-                tool_id_temp = tool.attrib['id'].lower()
-                if "compiler" in tool_id_temp:
-                    self.COMPILER_OPTIONS[tool.attrib['id']] = self.parse_tool_options(tool)
-                    debug_print("** self.COMPILER_OPTIONS:", self.COMPILER_OPTIONS)
-                if "linker" in tool_id_temp:
-                    self.LINKER_OPTIONS[tool.attrib['id']] = self.parse_tool_options(tool)
-                    debug_print("** self.LINKER_OPTIONS:", self.LINKER_OPTIONS)
-                if "hex" in tool_id_temp:
-                    self.HEX_OPTIONS[tool.attrib['id']] = self.parse_tool_options(tool)
-                    debug_print("** self.HEX_OPTIONS:", self.HEX_OPTIONS)
-
-        self.FILEINFO = {}
-        FILEINFO = {}
-        fileInfos = config_node.findall('.//fileInfo')
-        for fileInfo in fileInfos:
-            FILEINFO_DICT = {k:v for k,v in fileInfo.attrib.items()}  # copy atributes
-            temp_dict = dict(FILEINFO_DICT=FILEINFO_DICT)
-
-            COMPILER_OPTIONS = {}
-            LINKER_OPTIONS = {}
-            # parse fileInfo/tool
-            for tool in fileInfo.findall('./tool'):
-                tool_id_temp = tool.attrib['id'].lower()
-                if "compiler" in tool_id_temp:
-                    COMPILER_OPTIONS[tool.attrib['id']] = self.parse_tool_options(tool)
-                    debug_print("** fileInfo.COMPILER_OPTIONS:", COMPILER_OPTIONS)
-                if "linker" in tool_id_temp:
-                    LINKER_OPTIONS[tool.attrib['id']] = self.parse_tool_options(tool)
-                    debug_print("** fileInfo.LINKER_OPTIONS:", LINKER_OPTIONS)
-            temp_dict['COMPILER_OPTIONS'] = COMPILER_OPTIONS
-            temp_dict['LINKER_OPTIONS'] = LINKER_OPTIONS
-            FILEINFO[fileInfo.attrib['resourcePath']] = temp_dict
-        self.FILEINFO = FILEINFO
-        debug_print(FILEINFO)
-
-        self.EXCLUDE_INFO = []
-        EXCLUDE_INFO = []
-        sourceEntries = config_node.findall('.//sourceEntries')
-        for sourceEntry in sourceEntries:
-            entries = config_node.findall('.//entry')
-            for entry in entries:
-                ei_item = {k:v for k,v in entry.attrib.items()}  # copy atributes
-                ei_item['exclude_item_list'] = ei_item.get('excluding','').replace(';', '|').split('|')
-                EXCLUDE_INFO.append(ei_item)
-        self.EXCLUDE_INFO = EXCLUDE_INFO
-        debug_print(EXCLUDE_INFO)
+            self._parse_tools(xml.tools(toolChain), self.COMPILER_OPTIONS, self.LINKER_OPTIONS, self.HEX_OPTIONS, xml)
+            debug_print("** self.COMPILER_OPTIONS:", self.COMPILER_OPTIONS)
+            debug_print("** self.LINKER_OPTIONS:", self.LINKER_OPTIONS)
+            debug_print("** self.HEX_OPTIONS:", self.HEX_OPTIONS)
+
+        for fileInfo in xml.file_infos(config_node):
+            self.parse_file_info(fileInfo, xml)
+        debug_print(self.FILEINFO)
+
+        self.EXCLUDE_INFO = [ExcludeInfo.parse(entry) for entry in xml.source_entries(config_node)]
+        debug_print(self.EXCLUDE_INFO)
+
+    @timed('config_parse')
+    def parse_file_info(self, fileInfo, xml: 'xml_backend' = None) -> None:
+        xml = xml or get_xml_backend()
+        file_info = FileInfo(sys.intern(fileInfo.get('resourcePath')), dict(fileInfo.attrib))
+        # parse fileInfo/tool
+        self._parse_tools(xml.tools(fileInfo), file_info.COMPILER_OPTIONS, file_info.LINKER_OPTIONS, None, xml)
+        debug_print("** fileInfo.COMPILER_OPTIONS:", file_info.COMPILER_OPTIONS)
+        debug_print("** fileInfo.LINKER_OPTIONS:", file_info.LINKER_OPTIONS)
+        self.FILEINFO[file_info.resource_path] = file_info
+
+    @classmethod
+    def _parse_tools(cls, tool_nodes, compiler_options: Dict, linker_options: Dict, hex_options: Dict,
+                     xml: 'xml_backend') -> None:
+        # sort <tool> elements by the kind in their id (a tool may be of several kinds)
+        for tool in tool_nodes:
+            tool_id = tool.get('id')
+            tool_id_temp = tool_id.lower()
+            if "compiler" in tool_id_temp:
+                compiler_options[tool_id] = cls.parse_tool_options(tool, xml)
+            if "linker" in tool_id_temp:
+                linker_options[tool_id] = cls.parse_tool_options(tool, xml)
+            if "hex" in tool_id_temp and hex_options is not None:
+                hex_options[tool_id] = cls.parse_tool_options(tool, xml)
 
     @staticmethod
-    def parse_tool_options(tool_node, tag_select_str:str = './option') -> Dict:
-        tool_options = {}
-        for option in tool_node.findall(tag_select_str):
-            opt_key = option.attrib['id'].split('.')[-2]
-            opt_val = option.attrib.get('value', None)
-            if opt_val:
-                tool_options[opt_key] = opt_val
-            else:
-                list_options = []
-                tool_option_subitems = []
-                for listoptval in option.findall('listOptionValue'):
-                    list_options.append(listoptval.attrib['value'])
-                    tool_option_subitems.append({k:v for k,v in listoptval.attrib.items()})  # copy atributes
-                tool_options[opt_key] = list_options
-                tool_options[opt_key + "_SUBITEMS"] = tool_option_subitems
-            tool_options[opt_key + "_DICT"] = {k:v for k,v in option.attrib.items()}  # copy atributes
-        return tool_options
-
-
-class cdt_project:
-    PROJECT_DIR = '.'
-    WORKSPACE_DIR = '..'
-    PROJECT_NAME = 'unkown_project'
-    configs = {}
-    SRCS = []
-    RESOURCE_MAP = {}
-    variable_dict0 = []
-    variable_dict = []
-    project_xml = None
-    cproject_xml = None
-    ccsproject_xml = None
-
+    def parse_tool_options(tool_node, xml: 'xml_backend' = None) -> Tool:
+        return Tool.parse(tool_node, xml)
+
+
+config_info = Configuration  # name used before the public API
+
+
+class cproject_reader:
+    # streaming (iterparse) reader of .cproject: one forward pass builds the config_info of the selected
+    # configurations, and every element is dropped from the tree as soon as it has been consumed
+    def __init__(self, cproject_filepath):
+        self.cproject_filepath = cproject_filepath
+        self.config_attribs = {}  # configuration name -> attributes, in document order
+        self.config_infos = {}    # configuration name -> config_info of the selected configurations
+        self.references = []      # projects referenced by <reference project=...>
+
+    @timed('xml_parse')
+    def read(self, select=None) -> 'cproject_reader':
+        # select(config_name, config_index) -> bool chooses the configurations to parse
+        xml = get_xml_backend()
+        if xml.name == 'lxml':
+            self._read_lxml(xml, select)
+        else:
+            self._read_etree(xml, select)
+        return self
+
+    def _read_lxml(self, xml: 'xml_backend', select) -> None:
+        # the parser only reports the ends of <configuration> and <reference>, everything else stays in C; a
+        # configuration is parsed as a whole and dropped, so at most one is held in memory
+        for event, elem in xml.etree.iterparse(str(self.cproject_filepath), events=('end',), tag=('configuration', 'reference'),
+                                               remove_blank_text=True, resolve_entities=False):
+            parent = elem.getparent()
+            if elem.tag == 'configuration':
+                config_name = elem.get('name')
+                if config_name is None or parent is None or parent.get('moduleId') != 'cdtBuildSystem':
+                    continue
+                selected = (select is not None and config_name not in self.config_infos
+                            and select(config_name, len(self.config_attribs)))
+                self.config_attribs.setdefault(config_name, {k:v for k,v in elem.attrib.items()})  # copy atributes
+                if selected:
+                    info = Configuration()
+                    info.parse(elem)
+                    self.config_infos[config_name] = info
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del parent[0]
+            elif elem.get('project') and elem.get('project') not in self.references:
+                config_node = next(elem.iterancestors('configuration'), None)
+                if config_node is None or config_node.getparent().get('moduleId') != 'cdtBuildSystem':
+                    self.references.append(elem.get('project'))
+
+    def _read_etree(self, xml: 'xml_backend', select) -> None:
+        # every element passes through Python: the <fileInfo> children of a selected configuration are parsed
+        # and removed as they end, the rest of the configuration when it ends
+        stack = []
+        config_node = None
+        config_name = None
+        info = None
+        for event, elem in xml.etree.iterparse(self.cproject_filepath, events=('start', 'end')):
+            if event == 'start':
+                if (config_node is None and elem.tag == 'configuration' and 'name' in elem.attrib and len(stack) > 0
+                        and stack[-1].tag == 'storageModule' and stack[-1].get('moduleId') == 'cdtBuildSystem'):
+                    config_node = elem
+                    config_name = elem.attrib['name']
+                    selected = (select is not None and config_name not in self.config_infos
+                                and select(config_name, len(self.config_attribs)))
+                    self.config_attribs.setdefault(config_name, {k:v for k,v in elem.attrib.items()})  # copy atributes
+                    info = Configuration() if selected else None
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            parent = stack[-1] if len(stack) > 0 else None
+            if elem is config_node:
+                if info is not None:
+                    info.parse(elem)
+                    self.config_infos[config_name] = info
+                config_node = None
+                info = None
+            elif config_node is not None:
+                if parent is not config_node:
+                    continue  # consumed with its <configuration> child
+                if info is not None:
+                    if elem.tag != 'fileInfo':
+                        continue  # folderInfo, sourceEntries, ...: parsed at the end of the configuration
+                    info.parse_file_info(elem, xml)
+            elif elem.tag == 'reference' and elem.get('project') and elem.get('project') not in self.references:
+                self.references.append(elem.get('project'))
+            if parent is not None:
+                parent.remove(elem)
+
+
+class config_map(Mapping):
+    # configuration name -> config dict; the config_info of a configuration is only parsed when it is first
+    # accessed (or preloaded by Project), with a streaming pass over .cproject
+    def __init__(self, PROJECT_NAME: str, PROJECT_DIR: str, cproject_filepath: str):
+        self.PROJECT_NAME = PROJECT_NAME
+        self.PROJECT_DIR = PROJECT_DIR
+        self.cproject_filepath = cproject_filepath
+        self.attribs = {}  # configuration name -> attributes, in .cproject order
+        self.configs = {}  # configuration name -> parsed config dict
+        self.modified = False
+
+    def add_config(self, attrib: Dict, info: Configuration = None) -> None:
+        config_name = attrib['name']
+        self.attribs.setdefault(config_name, attrib)
+        if info is not None and config_name not in self.configs:
+            config = dict(attrib)
+            config['config_info'] = info
+            config['PROJECT_NAME'] = self.PROJECT_NAME
+            config['PROJECT_DIR'] = self.PROJECT_DIR
+            self.configs[config_name] = config
+            self.modified = True
+
+    def load(self, config_names: List[str]) -> None:
+        # parse every not yet parsed configuration of config_names in one pass
+        pending = set(config_name for config_name in config_names if config_name not in self.configs)
+        if len(pending) == 0:
+            return
+        reader = cproject_reader(self.cproject_filepath).read(lambda config_name, config_index: config_name in pending)
+        for config_name, info in reader.config_infos.items():
+            self.add_config(reader.config_attribs[config_name], info)
+
+    def __getitem__(self, config_name: str) -> Dict:
+        config = self.configs.get(config_name)
+        if config is None:
+            if config_name not in self.attribs:
+                raise KeyError(config_name)
+            self.load([config_name])
+            config = self.configs[config_name]
+        return config
+
+    def __iter__(self):
+        return iter(self.attribs)
+
+    def __len__(self) -> int:
+        return len(self.attribs)
+
+    def __contains__(self, config_name) -> bool:
+        return config_name in self.attribs
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.modified = False
+
+
+class Project(slotted):
+    # a CDT project: .project (name, linked resources, references) and its configurations (lazily parsed)
+    __slots__ = ('PROJECT_DIR', 'WORKSPACE_DIR', 'PROJECT_NAME', 'configs', 'SRCS', 'RESOURCE_MAP', 'LINKED_NAMES',
+                 'REFERENCED_PROJECTS', 'variable_dict0', 'variable_dict', 'variable_values', 'variable_pattern',
+                 'expand_cache', 'project_xml', 'cproject_xml', 'ccsproject_xml')
+    _derived_slots = ('variable_values', 'variable_pattern', 'expand_cache', 'project_xml', 'cproject_xml',
+                      'ccsproject_xml')
+    _xml_slots = ('project_xml', 'cproject_xml', 'ccsproject_xml')  # parsed again when needed, never pickled
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for name in self._xml_slots:
+            state[name] = None
+        return state
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.PROJECT_NAME!r}, {self.PROJECT_DIR!r})'
+
+    @timed('xml_parse')
     def _get_project_xml(self):
         if self.project_xml is None:
             project_filepath = Path(self.PROJECT_DIR, ".project")
-            self.project_xml = elemTree.parse(project_filepath)
+            self.project_xml = get_xml_backend().parse(project_filepath)
         return self.project_xml
 
+    @timed('xml_parse')
     def _get_cproject_xml(self):
         if self.cproject_xml is None:
             cproject_filepath = Path(self.PROJECT_DIR, ".cproject")
-            self.cproject_xml = elemTree.parse(cproject_filepath)
+            self.cproject_xml = get_xml_backend().parse(cproject_filepath)
         return self.cproject_xml
 
-    def __init__(self, PROJECT_DIR: str, WORKSPACE_DIR: str = None):
+    def __init__(self, PROJECT_DIR: str, WORKSPACE_DIR: str = None, preload_configs=None):
+        # preload_configs: configuration names parsed up front (True: all of them, None: the first one);
+        # the others are parsed on first access
         WORKSPACE_DIR = WORKSPACE_DIR or Path(PROJECT_DIR, '..')
         self.PROJECT_DIR = norm_path(PROJECT_DIR)
         self.WORKSPACE_DIR = norm_path(WORKSPACE_DIR)
+        self.project_xml = None
+        self.cproject_xml = None
+        self.ccsproject_xml = None
+        self.variable_dict0 = {}
+        self.variable_dict = {}
+        self.LINKED_NAMES = {}
         #
         self.PROJECT_NAME = self._get_project_name()
         self._gether_vaiable()
-        self.configs = self._get_configs()
+        self.configs, cproject_references = self._get_configs(preload_configs)
         self.SRCS, self.RESOURCE_MAP = self._get_srcs()
+        self.REFERENCED_PROJECTS = get_project_references(self._get_project_xml(), cproject_references)
 
     def _get_project_name(self) -> str:
         project_xml = self._get_project_xml()
         name_node = project_xml.find("./name")
         return name_node.text
 
+    @timed('variable_setup')
     def _get_srcs(self) -> List[str]:
         project_xml = self._get_project_xml()
         srcs = []
-        resource_map = {}
-        linked_resources = project_xml.find("./linkedResources") or []
-        for resource in linked_resources:
-            name = resource.find('name').text.strip()
+        resource_map = {}  # project resource path of a linked file/folder -> its location (not expanded)
+        self.LINKED_NAMES = {}  # expanded path of a linked file/folder -> its project resource path
+        for resource in project_xml.findall("./linkedResources/link"):
+            name = sys.intern(resource.find('name').text.strip())
             type = int(resource.find('type').text.strip())
             uri = resource.find('locationURI')
             uri = resource.find('location') if uri is None else uri
             if uri is not None:
-                resource_map[name] = uri
+                resource_map[name] = sys.intern(uri.text.strip())
                 if type == 1:
                     file_path = self.expand_variable(uri.text.strip())
                     file_path = norm_path(file_path)
                     srcs.append(file_path)
+                    self.LINKED_NAMES.setdefault(file_path, name)
                 if type == 2:
-                    uri = self.expand_variable(uri.text.strip())
-                    srcs.append('@linkedResources://' + uri)
+                    uri = sys.intern(self.expand_variable(uri.text.strip()))
+                    srcs.append(sys.intern('@linkedResources://' + uri))
+                    self.LINKED_NAMES.setdefault(uri, name)
         return srcs, resource_map
 
-    def _get_configs(self) -> Dict:
-        cproject_xml = self._get_cproject_xml()
+    def _get_configs(self, preload_configs=None) -> Tuple[config_map, List[str]]:
+        # (configurations, projects referenced by the configurations) from one streaming pass over .cproject
+        cproject_filepath = str(Path(self.PROJECT_DIR, ".cproject"))
+
+        def select(config_name, config_index):
+            if preload_configs is True:
+                return True
+            if preload_configs:
+                return config_name in preload_configs
+            return config_index == 0
 
-        configs = {}
-        config_nodes = cproject_xml.findall(".//storageModule[@moduleId='cdtBuildSystem']/configuration[@name]")
-        for config_node in config_nodes:
-            config_name = config_node.attrib['name']
-            configs[config_name] = {k:v for k,v in config_node.attrib.items()}  # copy atributes
-            configs[config_name]['config_info'] = config_info(config_node)
-            configs[config_name]['PROJECT_NAME'] = self.PROJECT_NAME
-            configs[config_name]['PROJECT_DIR'] = self.PROJECT_DIR
+        reader = cproject_reader(cproject_filepath).read(select)
+        configs = config_map(self.PROJECT_NAME, self.PROJECT_DIR, cproject_filepath)
+        for config_name, attrib in reader.config_attribs.items():
+            configs.add_config(attrib, reader.config_infos.get(config_name))
+        configs.modified = False
 
         # for config_name, config in configs.items():
         #     print(f"-- proj name: {config['PROJECT_NAME']}")
         #     print(f"  -- config: {config_name} (artifactName: {config['artifactName']})")
         #     print(f"    -- {config}")
 
-        return configs
+        return configs, reader.references
 
+    @timed('variable_setup')
     def _gether_vaiable(self) -> None:
         if len(self.variable_dict0) == 0:
             self.variable_dict0 = {}
@@ -239,44 +736,563 @@ class cdt_project:
             self.variable_dict['PROJECT_LOC'] = self.PROJECT_DIR
             # debug_print('variable_dict', self.variable_dict)
 
-    def expand_variable(self, text: str) -> str:
+        self._compile_variable_pattern()
+
+    def _compile_variable_pattern(self) -> None:
+        self.variable_values = dict(self.variable_dict0)
+        self.variable_values.update(self.variable_dict)
+        # longest name first, so PARENT-11-PROJECT_LOC wins over PARENT-1-PROJECT_LOC and PROJECT_LOC
+        names = sorted(self.variable_values, key=len, reverse=True)
+        self.variable_pattern = re.compile(
+            r'\$\{([^${}:]+)(?::([^${}]*))?\}'  # ${name} or ${name:arg} without nested ${...}
+            r'|(?<![\w{-])(' + '|'.join(re.escape(name) for name in names) + r')(?![\w-])'  # bare name
+        )
+        self.expand_cache = {}
+
+    def _expand_match(self, match) -> str:
+        name, arg, bare_name = match.groups()
+        if bare_name is not None:
+            return self.variable_values[bare_name]
+        value = self.variable_values.get(name)
+        if value is None:
+            return match.group(0)  # unknown variable: left as written
+        if arg is None:
+            return value
+        if name == 'workspace_loc':
+            project_prefix = '/' + self.PROJECT_NAME
+            if arg == project_prefix or arg.startswith(project_prefix + '/'):
+                return self.PROJECT_DIR + arg[len(project_prefix):]
+        return value + arg
+
+    def expand_variable(self, text: str, cache: bool = True) -> str:
+        # cache=False: a text seen once (a streamed file path) is expanded without a cache entry
+        expanded = self.expand_cache.get(text)
+        if STATS.enabled:
+            STATS.count('expand_calls')
+            if expanded is not None:
+                STATS.count('expand_cache_hits')
+        if expanded is not None:
+            return expanded
+        if not text:
+            return text
+
+        expanded = text
         is_quoted = False
-        if text[0] == '"' and text[-1] == '"' and text.count('"') == 2:
-            text = text[1:-1]
+        if expanded[0] == '"' and expanded[-1] == '"' and expanded.count('"') == 2:
+            expanded = expanded[1:-1]
             is_quoted = True
 
-        if '${workspace_loc:/${ProjName}' in text and text[-1] == '}':
-            text = text[0:-1].replace('${workspace_loc:/${ProjName}', '${PROJECT_LOC}')
+        # one pass per nesting level, innermost ${...} first
+        for _ in range(8):
+            next_text = self.variable_pattern.sub(self._expand_match, expanded)
+            if next_text == expanded:
+                break
+            expanded = next_text
 
-        if text[-1] == '}' and ':' in text:
-            tmp = text.split(':')
-            text = tmp[0] + '}' + tmp[1][0:-1]
+        if is_quoted:
+            expanded = f'"{expanded}"'
+
+        if cache:
+            self.expand_cache[text] = expanded
+        return expanded
+
+
+cdt_project = Project  # name used before the public API
+
+
+class exclude_matcher:
+    # CDT sourceEntries exclusions compiled into one regex over project resource paths
+    # ('src/foo', 'linked_folder/bar.c'): a pattern excludes the path itself and everything below it,
+    # '*' and '?' match within a path segment, '**' across segments
+    def __init__(self, exclude_info: List[ExcludeInfo], PROJECT_NAME: str = None):
+        patterns = []
+        for ei_item in exclude_info:
+            base = ei_item.name.strip('/')
+            if PROJECT_NAME and (base == PROJECT_NAME or base.startswith(PROJECT_NAME + '/')):
+                base = base[len(PROJECT_NAME):].strip('/')  # workspace path of a source folder
+            for exclude_item in ei_item.exclude_item_list:
+                exclude_item = exclude_item.strip().strip('/')
+                if len(exclude_item) > 0:
+                    patterns.append(self.glob_to_regex(f'{base}/{exclude_item}' if base else exclude_item))
+        self.pattern = None
+        if len(patterns) > 0:
+            self.pattern = re.compile('(?:' + '|'.join(patterns) + r')(?:/.*)?\Z', re.DOTALL)
 
-        for k,v in self.variable_dict0.items():
-            text = text.replace(f'${{{k}}}', v)
-            text = text.replace(k, v)
+    @staticmethod
+    def glob_to_regex(pattern: str) -> str:
+        regex = []
+        for token in re.split(r'(\*\*/|\*\*|\*|\?)', pattern):
+            if token == '**/':
+                regex.append('(?:.*/)?')
+            elif token == '**':
+                regex.append('.*')
+            elif token == '*':
+                regex.append('[^/]*')
+            elif token == '?':
+                regex.append('[^/]')
+            else:
+                regex.append(re.escape(token))
+        return ''.join(regex)
+
+    def match(self, resource_path: str) -> bool:
+        return self.pattern is not None and len(resource_path) > 0 and self.pattern.match(resource_path) is not None
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, exclude_matcher) and self.pattern == other.pattern
+
+    def __hash__(self) -> int:
+        return hash(self.pattern)
+
+
+class dir_index:
+    # directory listings (candidate file names, sub directory names) keyed by path and validated by mtime,
+    # so an unchanged directory is only stat()ed instead of listed again
+    RACY_MTIME_NS = 2 * 10**9
+
+    def __init__(self, entries: Dict = None, keep_listings: bool = True):
+        self.entries = entries or {}  # dir path -> (mtime_ns, file names, sub dir names)
+        self.visited = set()
+        self.modified = False
+        self.keep_listings = keep_listings  # False: remember nothing, every call lists (one-shot streaming runs)
+
+    def list_dir(self, path: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        cached = self.entries.get(path)
+        if cached is not None and path in self.visited:
+            return cached[1], cached[2]  # already validated in this pass
+        if self.keep_listings:
+            self.visited.add(path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return (), ()
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+
+        files = []
+        dir_names = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if not entry.is_symlink():
+                            dir_names.append(entry.name)
+                        continue
+                    file = entry.name
+                    if file.endswith(SCAN_FILE_EXTS) and "CMake" not in file and "CompilerId." not in file:
+                        files.append(file)
+        except OSError:
+            return (), ()
+
+        listing = (tuple(files), tuple(dir_names))
+        STATS.count('dirs_listed')
+        if not self.keep_listings:
+            return listing
+        # a directory changed within the mtime granularity may change again unnoticed: don't trust it next time
+        if time.time_ns() - mtime_ns < self.RACY_MTIME_NS:
+            mtime_ns = None
+        self.entries[path] = (mtime_ns, *listing)
+        self.modified = True
+        return listing
+
+    def new_pass(self, changed_dirs: List[str] = None) -> None:
+        # validate every directory against the file system again, or when the changed directories are
+        # known (file system watch): list those again and trust every other cached listing without a stat()
+        if changed_dirs is None:
+            self.visited = set()
+        else:
+            self.visited = set(self.entries.keys()).difference(changed_dirs)
+            for path in changed_dirs:
+                self.entries.pop(path, None)
+
+    def forget(self, path: str) -> None:
+        # drop a directory (removed from the file system) and everything below it
+        prefix = path.rstrip('/') + '/'
+        for cached_path in list(self.entries.keys()):
+            if cached_path == path or cached_path.startswith(prefix):
+                del self.entries[cached_path]
+                self.visited.discard(cached_path)
+                self.modified = True
+
+    def changed_dirs(self) -> List[str]:
+        # cached directories whose mtime no longer matches
+        changed = []
+        for path, (mtime_ns, files, dir_names) in self.entries.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    changed.append(path)
+            except OSError:
+                changed.append(path)
+        return changed
+
+    def drop_unvisited(self) -> None:
+        for path in list(self.entries.keys()):
+            if path not in self.visited:
+                del self.entries[path]
+                self.modified = True
+
+
+class project_cache:
+    # on-disk cache of the parsed Project and the directory index, kept in <PROJECT_DIR>/.cdt2cmake-cache; each file
+    # is a header line (format and key) followed by a pickle, only unpickled when the header matches: the cache
+    # directory must be trusted, as a pickle crafted by someone able to write it runs code when loaded
+    CACHE_DIR_NAME = '.cdt2cmake-cache'
+    CACHE_FORMAT = 5  # bump when the pickled model or the file layout changes
+    PROJECT_FILE = 'project.pickle'
+    DIR_INDEX_FILE = 'dir_index.pickle'
 
-        for k,v in self.variable_dict.items():
-            text = text.replace(f'${{{k}}}', v)
-            text = text.replace(k, v)
+    def __init__(self, PROJECT_DIR: str, WORKSPACE_DIR: str = None):
+        self.PROJECT_DIR = PROJECT_DIR
+        self.WORKSPACE_DIR = WORKSPACE_DIR
+        self.cache_dir = Path(PROJECT_DIR, self.CACHE_DIR_NAME)
+
+    def _project_key(self) -> str:
+        import hashlib
+        key = hashlib.sha256()
+        for item in (__version__, self.CACHE_FORMAT, self.PROJECT_DIR, self.WORKSPACE_DIR, os.path.abspath(self.PROJECT_DIR)):
+            key.update(repr(item).encode())
+        for filename in ('.project', '.cproject'):
+            key.update(Path(self.PROJECT_DIR, filename).read_bytes())
+        return key.hexdigest()
+
+    def _header(self, key: str) -> bytes:
+        return repr(('cdt2cmake-cache', self.CACHE_FORMAT, key)).encode() + b'\n'
+
+    def _load(self, filename: str, key: str):
+        # the cached object stored under key, None when missing, stale or unreadable (nothing unpickled then)
+        import pickle
+        header = self._header(key)
+        try:
+            with open(Path(self.cache_dir, filename), 'rb') as f:
+                if f.read(len(header)) != header:
+                    return None
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _store(self, filename: str, key: str, obj) -> None:
+        import pickle
+        self.cache_dir.mkdir(exist_ok=True)
+        tmp_path = Path(self.cache_dir, f'{filename}.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(self._header(key))
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, Path(self.cache_dir, filename))
+
+    @timed('cache')
+    def load_project(self, preload_configs=None) -> Project:
+        self.project_key = self._project_key()
+        cached = self._load(self.PROJECT_FILE, self.project_key)
+        self.project_hit = cached is not None
+        if self.project_hit:
+            return cached
+        return Project(self.PROJECT_DIR, self.WORKSPACE_DIR, preload_configs)
+
+    @timed('cache')
+    def store_project(self, cdt_prj: Project) -> None:
+        # store a freshly parsed project, or a cached one with newly parsed configurations
+        if not self.project_hit or cdt_prj.configs.modified:
+            self._store(self.PROJECT_FILE, self.project_key, cdt_prj)
+            cdt_prj.configs.modified = False
+
+    @timed('cache')
+    def load_dir_index(self) -> dir_index:
+        cached = self._load(self.DIR_INDEX_FILE, os.getcwd())
+        return dir_index(cached) if cached is not None else dir_index()
+
+    @timed('cache')
+    def store_dir_index(self, index: dir_index) -> None:
+        index.drop_unvisited()
+        if index.modified:
+            self._store(self.DIR_INDEX_FILE, os.getcwd(), index.entries)
+
+
+@contextlib.contextmanager
+def file_lock(path: str, shared: bool = False):
+    # advisory lock on path (created when missing) held while the block runs; shared: a read lock
+    # (POSIX only, Windows locks are always exclusive)
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after 10 s: keep waiting
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def default_scan_index_dir() -> str:
+    # per user cache directory shared by every workspace
+    base_dir = os.environ.get('LOCALAPPDATA') if os.name == 'nt' else os.environ.get('XDG_CACHE_HOME')
+    return os.path.join(base_dir or os.path.join(os.path.expanduser('~'), '.cache'), 'cdt2cmake', 'scan-index')
+
+
+class scan_index:
+    # directory listings of the linked folders outside the project (SDKs such as C2000Ware/driverlib), shared by
+    # every project linking the same real directory: one dir_index per root in a shared directory, keyed by the
+    # real path of the root, read and written under a file lock; only the directories a project walks into (after
+    # its prune rules and exclusions) are validated, each one at most once per run: a directory checked since
+    # run_started is trusted without a stat(), so concurrent conversions list a directory once; a stored root is a
+    # header line (format and root) followed by a pickle, only unpickled when the header matches: the shared
+    # directory must be trusted, as a pickle crafted by someone able to write it runs code when loaded
+    FORMAT = 3  # bump when the stored entries or the file layout change
+
+    def __init__(self, cache_dir: str, run_started: int = None):
+        self.cache_dir = cache_dir
+        self.run_started = run_started if run_started is not None else time.time_ns()
+        self.roots = {}  # real root directory -> dir_index, visited: the directories trusted in this run
+        self.root_locks = {}
+        self.lock = threading.Lock()
+
+    def __reduce__(self):
+        # sent to a workspace worker: one instance per process and run, keeping the roots it has loaded
+        return open_scan_index, (self.cache_dir, self.run_started)
+
+    def _paths(self, real_dir: str) -> Tuple[str, str]:
+        import hashlib
+        key = hashlib.sha256(real_dir.encode()).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f'{key}.pickle'), os.path.join(self.cache_dir, f'{key}.lock')
+
+    def get(self, real_dir: str, walk=None) -> dir_index:
+        # the index of a root; walk(list_dir) calls list_dir on every directory the caller is going to list,
+        # those not checked in this run yet are validated (and stored) first
+        with self.lock:
+            root_lock = self.root_locks.setdefault(real_dir, threading.Lock())
+        with root_lock:
+            index = self.roots.get(real_dir)
+            if index is None:
+                index = self._load_root(real_dir)
+                self.roots[real_dir] = index
+            if walk is not None:
+                if self._is_checked(index, walk):
+                    STATS.count('scan_index_hits')
+                else:
+                    index = self._refresh(real_dir, walk)
+                    self.roots[real_dir] = index
+        return index
+
+    def _header(self, real_dir: str) -> bytes:
+        return repr(('cdt2cmake-scan-index', self.FORMAT, real_dir)).encode() + b'\n'
+
+    def _load(self, index_path: str, real_dir: str):
+        # (entries, time each directory was checked) of a stored root, or None (nothing unpickled when the header
+        # does not match)
+        import pickle
+        header = self._header(real_dir)
+        try:
+            with open(index_path, 'rb') as f:
+                if f.read(len(header)) != header:
+                    return None
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _to_index(self, cached) -> dir_index:
+        entries, checked = cached if cached is not None else ({}, {})
+        index = dir_index(entries)
+        index.visited = set(path for path, checked_ns in checked.items() if checked_ns >= self.run_started)
+        return index
+
+    @timed('scan_index')
+    def _load_root(self, real_dir: str) -> dir_index:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path, lock_path = self._paths(real_dir)
+        with file_lock(lock_path, shared=True):
+            return self._to_index(self._load(index_path, real_dir))
 
-        if is_quoted:
-            text = f'"{text}"'
+    @staticmethod
+    def _is_checked(index: dir_index, walk) -> bool:
+        # walk the stored listings: is every directory walk enters checked in this run
+        unchecked = []
+
+        def list_dir(path):
+            if path not in index.visited:
+                unchecked.append(path)
+            cached = index.entries.get(path)
+            return (cached[1], cached[2]) if cached is not None else ((), ())
+
+        walk(list_dir)
+        return len(unchecked) == 0
+
+    @timed('scan_index')
+    def _refresh(self, real_dir: str, walk) -> dir_index:
+        # validate (list again when changed) the directories walk enters that no process has checked in this run,
+        # drop the directories no longer reachable from the root and store it
+        import pickle
+        index_path, lock_path = self._paths(real_dir)
+        with file_lock(lock_path):
+            cached = self._load(index_path, real_dir)
+            index = self._to_index(cached)
+            checked = cached[1] if cached is not None else {}
+            trusted = set(index.visited)
+            validated = time.time_ns()
+            walk(index.list_dir)
+            newly_checked = index.visited.difference(trusted)
+            if len(newly_checked) == 0:
+                return index  # checked by another process meanwhile
+            for path in newly_checked:
+                checked[path] = validated
+            self._drop_unreachable(real_dir, index.entries, checked)
+            tmp_path = f'{index_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(self._header(real_dir))
+                pickle.dump((index.entries, checked), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, index_path)
+        STATS.count('scan_index_walks')
+        return index
 
-        return text
+    @staticmethod
+    def _drop_unreachable(real_dir: str, entries: Dict, checked: Dict) -> None:
+        # keep the directories reachable from the root through the stored listings (removed ones are not)
+        reachable = set()
+        dir_stack = [real_dir]
+        while dir_stack:
+            path = dir_stack.pop()
+            cached = entries.get(path)
+            if cached is None or path in reachable:
+                continue
+            reachable.add(path)
+            dir_stack.extend(os.path.join(path, dir_name) for dir_name in cached[2])
+        for mapping in (entries, checked):
+            for path in list(mapping.keys()):
+                if path not in reachable:
+                    del mapping[path]
+
+
+_SCAN_INDEXES = {}
+
+
+def open_scan_index(cache_dir: str = None, run_started: int = None) -> scan_index:
+    # the scan_index of cache_dir (default: default_scan_index_dir()) for this run, shared within the process
+    cache_dir = os.path.abspath(cache_dir or default_scan_index_dir())
+    if run_started is None:
+        return scan_index(cache_dir)
+    index = _SCAN_INDEXES.get((cache_dir, run_started))
+    if index is None:
+        index = _SCAN_INDEXES.setdefault((cache_dir, run_started), scan_index(cache_dir, run_started))
+    return index
+
+
+class build_acceleration(slotted):
+    # opt-in settings added to every generated target to speed up its build
+    __slots__ = ('unity_batch_size', 'unity_group_by_dir', 'ccache', 'pch_headers', 'link_pool')
+
+    def __init__(self, unity_batch_size: int = None, unity_group_by_dir: bool = False, ccache: bool = False,
+                 pch_headers: List[str] = None, link_pool: bool = False):
+        self.unity_batch_size = unity_batch_size      # UNITY_BUILD with this batch size, None: off
+        self.unity_group_by_dir = unity_group_by_dir  # unity sources of one directory (at most a batch) together
+        self.ccache = ccache                          # CMAKE_<LANG>_COMPILER_LAUNCHER (not for TI compilers)
+        self.pch_headers = pch_headers or []          # target_precompile_headers (not for TI compilers)
+        self.link_pool = link_pool                    # Ninja job pool of one link for TI targets
+
+    def enabled(self) -> bool:
+        return bool(self.unity_batch_size or self.ccache or self.pch_headers or self.link_pool)
 
 
 class cmake_generator:
     target_filename = 'CMakeLists.txt'
     target_dir = '.'
     variable_dict = None
+    project_dirs = None
+    config_subdirs = False  # referenced projects are added from their <config>/CMakeLists.txt (dirs layout)
+    scan_jobs = 8  # threads walking search roots (project directory, linked folders) concurrently
+    sort_files = True  # False: stream the files in the order found (see iter_src_files)
+    shared_index = None  # scan_index listing the linked folders outside the project
 
-    def __init__(self, cdt_prj: cdt_project):
+    def __init__(self, cdt_prj: Project):
         self.cdt_prj = cdt_prj
+        self.scan_results = {}
+        self.exclude_matchers = {}
+        self.ignore_list = []
+        self.dir_index = dir_index()
+        self.acceleration = build_acceleration()
 
     def set_gen_target_dir(self, path: str) -> None:
         self.target_dir = path
 
+    def set_project_dirs(self, project_dirs: Dict[str, str]) -> None:
+        # project name -> directory of the sibling projects in the workspace
+        self.project_dirs = project_dirs
+
+    def set_config_subdirs(self, config_subdirs: bool) -> None:
+        self.config_subdirs = config_subdirs
+
+    def get_referenced_project_dirs(self) -> List[Tuple[str, str]]:
+        referenced = []
+        for project_name in self.cdt_prj.REFERENCED_PROJECTS:
+            if self.project_dirs is not None:
+                project_dir = self.project_dirs.get(project_name)
+            else:
+                project_dir = norm_path(Path(self.cdt_prj.WORKSPACE_DIR, project_name))
+                if not Path(project_dir, '.project').exists():
+                    project_dir = None
+            if project_dir is not None and project_name != self.cdt_prj.PROJECT_NAME:
+                referenced.append((project_name, project_dir))
+        return referenced
+
+    @staticmethod
+    def is_library(config: config_info) -> bool:
+        artifact_type = config.get('buildArtefactType') or ''
+        return 'staticLib' in artifact_type or config.get('artifactExtension') in ('lib', 'a')
+
+    @staticmethod
+    def is_ti_toolchain(config: config_info) -> bool:
+        # TI code generation tools (C2000, ARM, MSP430, ...) rather than e.g. a GNU toolchain
+        config_info = config['config_info']
+        return any('com.ti.' in (element.superClass or element.id or '')
+                   for element in (config_info.toolChain, config_info.TARGETPLATFORM))
+
+    @classmethod
+    def get_compiler_command(cls, config: config_info) -> str:
+        config_info = config['config_info']
+        if cls.is_ti_toolchain(config):
+            platform = config_info.TARGETPLATFORM.superClass or config_info.toolChain.superClass or ''
+            for family, compiler in TI_COMPILERS:
+                if family in platform:
+                    return compiler
+        return 'cc'
+
+    def get_project_dir_ref(self) -> str:
+        # PROJECT_DIR as seen from the directory the CMakeLists.txt is written to
+        if self.target_dir == '.':
+            return self.cdt_prj.PROJECT_DIR
+        return Path(os.path.relpath(self.cdt_prj.PROJECT_DIR, self.target_dir)).as_posix()
+
+    def set_dir_index(self, index: 'dir_index') -> None:
+        self.dir_index = index
+        self.scan_results = {}
+
+    def set_sort_files(self, sort_files: bool) -> None:
+        self.sort_files = sort_files
+
+    def set_shared_index(self, shared_index: 'scan_index') -> None:
+        self.shared_index = shared_index
+        self.scan_results = {}
+
+    def set_build_acceleration(self, acceleration: build_acceleration) -> None:
+        self.acceleration = acceleration or build_acceleration()
+
+    def set_ignore_list(self, ignore_list: List[str]) -> None:
+        # directory names (or project relative paths when they contain '/') to skip while scanning
+        self.ignore_list = [norm_path(item).strip('/') for item in (ignore_list or []) if item]
+        self.scan_results = {}
+
     def gether_vaiable(self, config: config_info) -> None:
         if self.variable_dict is None:
             self.variable_dict = {}
@@ -286,11 +1302,13 @@ class cmake_generator:
             # self.variable_dict['${PROJECT_LOC}'] = config['PROJECT_DIR']
             # debug_print('variable_dict', self.variable_dict)
 
-    def expand_variable(self, text: str) -> str:
-        text = self.cdt_prj.expand_variable(text)
+    @timed('expansion')
+    def expand_variable(self, text: str, cache: bool = True) -> str:
+        text = self.cdt_prj.expand_variable(text, cache)
 
-        for k,v in self.variable_dict.items():
-            text = text.replace(k, v)
+        if self.variable_dict:
+            for k,v in self.variable_dict.items():
+                text = text.replace(k, v)
 
         return text
 
@@ -304,115 +1322,506 @@ class cmake_generator:
             path = path.replace(self.cdt_prj.PROJECT_DIR, '${PROJECT_DIR}')
         return quote_path(path)
 
+    @staticmethod
+    def absolute_path(path: str) -> str:
+        # paths still holding an unknown variable (e.g. ${CG_TOOL_ROOT}) are left as they are
+        if '${' in path or os.path.isabs(path):
+            return path
+        return norm_path(os.path.abspath(path))
+
+    def resolve_resource_path(self, resource_path: str) -> str:
+        # file system path of a project resource path: a linked file, a file below a linked folder, or a file
+        # below PROJECT_DIR (not expanded)
+        location = self.cdt_prj.RESOURCE_MAP.get(resource_path)
+        if location is not None:
+            return location
+        parts = resource_path.split('/')
+        for index in range(len(parts) - 1, 0, -1):
+            location = self.cdt_prj.RESOURCE_MAP.get('/'.join(parts[:index]))
+            if location is not None:
+                return f"{location}/{'/'.join(parts[index:])}"
+        return f'{self.cdt_prj.PROJECT_DIR}/{resource_path}'
+
+    def get_resource_path(self, path: str) -> str:
+        # project resource path of an expanded path (the inverse of resolve_resource_path), or None outside the
+        # project and its linked resources; a bare file name (a library searched for) is taken as project relative
+        if '/' not in path:
+            return path
+        path = Path(os.path.normpath(path)).as_posix()
+        for location, name in self.cdt_prj.LINKED_NAMES.items():
+            location = Path(os.path.normpath(location)).as_posix()
+            if path == location:
+                return name
+            if path.startswith(location + '/'):
+                return f"{name}/{path[len(location) + 1:]}"
+        rel_path = Path(os.path.relpath(path, self.cdt_prj.PROJECT_DIR)).as_posix()
+        if rel_path == '.' or rel_path.startswith('../') or os.path.isabs(rel_path):
+            return None
+        return rel_path
+
+    def get_file_overrides(self, config: config_info) -> List[Tuple[str, List[str], List[str], List[str]]]:
+        # [(source file, definitions, include directories, compile options)] of the fileInfo overrides of config,
+        # in .cproject order, with expanded and normalized (not quoted) paths; excluded files are skipped
+        config_info = config['config_info']
+        is_c2000 = 'C2000' in (config_info.TARGETPLATFORM.superClass or '')
+        is_excluded = self.get_exclude_matcher(config).match
+        config_tools = list(config_info.COMPILER_OPTIONS.values())
+        overrides = []
+        for file_resource_path, file_info in config_info.FILEINFO.items():
+            if is_excluded(file_resource_path):
+                continue
+            definitions = []
+            include_dirs = []
+            options = []
+            for file_tool in file_info.COMPILER_OPTIONS.values():
+                for key in ('symbols', 'DEFINE'):
+                    definitions.extend(self.expand_variable(item_val) for item_val in file_tool.values(key))
+                for key in ('paths', 'INCLUDE_PATH'):
+                    include_dirs.extend(norm_path(self.expand_variable(item_val)) for item_val in file_tool.values(key))
+                if is_c2000:
+                    options.extend(self.get_file_compile_options(file_tool, config_tools))
+            if len(definitions) == 0 and len(include_dirs) == 0 and len(options) == 0:
+                continue
+            file_path = norm_path(self.expand_variable(self.resolve_resource_path(file_resource_path)))
+            overrides.append((file_path, definitions, include_dirs, options))
+        return overrides
+
+    def get_file_properties(self, config: config_info) -> List[Tuple[List[str], List[Tuple[str, List[str]]]]]:
+        # [(source files, [(property name, values)])] of the fileInfo overrides of config, the files with
+        # identical overrides grouped, in .cproject order
+        groups = {}  # properties -> source files
+        for file_path, definitions, include_dirs, options in self.get_file_overrides(config):
+            include_dirs = [unquote_path(self.path_from_dir_item(include_dir)) for include_dir in include_dirs]
+            properties = tuple((property_name, tuple(values)) for property_name, values in
+                               (('COMPILE_DEFINITIONS', definitions), ('INCLUDE_DIRECTORIES', include_dirs),
+                                ('COMPILE_OPTIONS', options)) if len(values) > 0)
+            groups.setdefault(properties, []).append(self.path_from_file_item(file_path))
+        return [(file_paths, [(property_name, list(values)) for property_name, values in properties])
+                for properties, file_paths in groups.items()]
+
+    @staticmethod
+    def get_file_compile_options(file_tool: 'Tool', config_tools: List['Tool']) -> List[str]:
+        # TI compiler flags of the enumerated/boolean options a fileInfo tool sets differently from the configuration
+        flags = []
+        for key in C2000_FILE_OPTION_KEYS:
+            value = file_tool.get(key)
+            if not value or any(config_tool.get(key) == value for config_tool in config_tools):
+                continue
+            value = value.split('.')[-1]
+            if value == 'true':
+                flags.append(f'--{key.lower()}')
+            elif value != 'false':
+                flags.append(f'--{key.lower()}={value.lower()}')
+        return flags
+
     def get_src_files(self, config: config_info, current_target_name: str, search_dir_arg: str = None) -> List[str]:
+        src_files, lib_files = self.scan_files(config, search_dir_arg)
+        return list(src_files)
+
+    def get_lib_files(self, config: config_info, current_target_name: str, search_dir_arg: str = None) -> List[str]:
+        src_files, lib_files = self.scan_files(config, search_dir_arg)
+        return list(lib_files)
+
+    def iter_src_files(self, config: config_info, lib_files: List[str] = None):
+        # the source files of config, sorted from the scan shared by every configuration or, without sort_files,
+        # streamed from the file system; the library files are added to lib_files (complete once the sources are)
+        if self.sort_files:
+            src_files, scanned_lib_files = self.scan_files(config)
+            if lib_files is not None:
+                lib_files.extend(scanned_lib_files)
+            return iter(src_files)
+        return self._stream_src_files(config, lib_files)
+
+    def _stream_src_files(self, config: config_info, lib_files: List[str] = None):
+        for file_path, is_src, is_lib in self.iter_scan_files(config):
+            if is_lib and lib_files is not None:
+                lib_files.append(file_path)
+            if is_src:
+                yield file_path
+
+    def get_build_dirs(self, config: config_info) -> List[str]:
+        # project relative build output folders of the configuration
+        config_info = config['config_info']
+        build_dirs = []
+        build_path = config_info.BUILDER.get('buildPath') or '${BuildDirectory}'
+        artifact_dir = os.path.dirname(config.get('artifactName') or '')
+        for path in (build_path, artifact_dir):
+            if not path:
+                continue
+            path = path.replace('${BuildDirectory}', '${PROJECT_LOC}/' + config['name'])
+            path = norm_path(self.expand_variable(path))
+            rel_path = Path(os.path.relpath(path, self.cdt_prj.PROJECT_DIR)).as_posix()
+            if rel_path != '.' and not rel_path.startswith('..'):
+                build_dirs.append(rel_path)
+        return build_dirs
+
+    def get_prune_rules(self, config: config_info) -> Tuple[Set[str], Set[str]]:
+        # (directory names pruned everywhere, project relative directories pruned below PROJECT_DIR); only the
+        # build output of config is pruned, --ignore covers the output of other configurations
+        prune_names = set(IGNORE_DIR_NAMES)
+        prune_paths = set(self.get_build_dirs(config))
+        for item in self.ignore_list:
+            if '/' in item:
+                prune_paths.add(item)
+            else:
+                prune_names.add(item)
+        return prune_names, prune_paths
+
+    def get_exclude_matcher(self, config: config_info) -> 'exclude_matcher':
+        matcher = self.exclude_matchers.get(config['name'])
+        if matcher is None:
+            matcher = exclude_matcher(config['config_info'].EXCLUDE_INFO, self.cdt_prj.PROJECT_NAME)
+            self.exclude_matchers[config['name']] = matcher
+        return matcher
+
+    @timed('directory_scan')
+    def scan_files(self, config: config_info, search_dir_arg: str = None) -> Tuple[List[str], List[str]]:
         config_info = config['config_info']
         if search_dir_arg is None:
             search_dir_arg = config['PROJECT_DIR']
-        is_c2000 = 'C2000' in config_info.TARGETPLATFORM.get('superClass')
+        is_c2000 = 'C2000' in config_info.TARGETPLATFORM.superClass
+        prune_names, prune_paths = self.get_prune_rules(config)
+        is_excluded = self.get_exclude_matcher(config).match
 
-        # file_list = self.cdt_prj.SRCS
-        file_list = []
-        search_dirs = [search_dir_arg]
+        scan_key = (search_dir_arg, is_c2000, frozenset(prune_names), frozenset(prune_paths), is_excluded)
+        if scan_key in self.scan_results:
+            return self.scan_results[scan_key]
 
+        src_files = []
+        lib_files = []
+        files_considered = 0
+        for uri in self.cdt_prj.SRCS:
+            if not uri.startswith('@linkedResources://'):
+                files_considered += 1
+                if not is_excluded(self.cdt_prj.LINKED_NAMES.get(uri, '')):
+                    self._sort_file(uri, uri, is_c2000, src_files, lib_files)
+
+        prune_name_match = re.compile('|'.join(fnmatch.translate(name) for name in prune_names)).match
+        search_roots = self.get_search_roots(search_dir_arg, is_excluded)
+
+        def walk(search_root):
+            return self._walk_root(search_root, is_c2000, prune_name_match, prune_paths, is_excluded)
+
+        if len(search_roots) < 2:
+            walked = [walk(search_root) for search_root in search_roots]
+        else:
+            # linked folders often live on slow (network) storage: list the roots concurrently
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(len(search_roots), self.scan_jobs)) as executor:
+                walked = list(executor.map(walk, search_roots))
+        dirs_visited = 0
+        for root_src_files, root_lib_files, root_dirs_visited, root_files_considered in walked:
+            src_files += root_src_files
+            lib_files += root_lib_files
+            dirs_visited += root_dirs_visited
+            files_considered += root_files_considered
+
+        # sorted, and a file reached through two roots (or two spellings of its path) only once
+        src_files = self._unique_sorted(src_files)
+        lib_files = self._unique_sorted(lib_files)
+        self.scan_results[scan_key] = (src_files, lib_files)
+        STATS.count('dirs_visited', dirs_visited)
+        STATS.count('files_considered', files_considered)
+        STATS.count('files_kept', len(set(src_files).union(lib_files)))
+        return src_files, lib_files
+
+    def get_search_roots(self, search_dir_arg: str, is_excluded) -> List[Tuple[str, str, bool, str, Set[str]]]:
+        # (directory, resource path of the directory, directory is below PROJECT_DIR, real path of the directory,
+        #  real paths of the other roots inside it) of the project directory and the linked folders, each
+        # directory once: a root inside another one is walked as itself (its own resource paths and exclusions),
+        # and the walk of the outer root stops there
+        candidates = [(search_dir_arg, '', True)]
         for uri in self.cdt_prj.SRCS:
             if uri.startswith('@linkedResources://'):
                 uri_dir = uri[len('@linkedResources://'):]
-                search_dirs.append(uri_dir)
-            else:
-                file = uri
-                if file.endswith('.c') or file.endswith('.cla') or file.endswith('.asm') or (is_c2000 and file.endswith('.cmd')):
-                    file_list.append(file)
-
-        for search_dir in search_dirs:
-            # start walk dir into search_dir and gether files with ['.c', '.asm'] extention
-            for root, dirs, files in os.walk(search_dir):
-                for file in files:
-                    if file.endswith('.c') or file.endswith('.cla') or file.endswith('.asm') or (is_c2000 and file.endswith('.cmd')):
-                        if "CMake" not in file and "CompilerId." not in file:
-                            file_path = Path(root, file)
-                            file_path = norm_path(file_path)
-                            file_list.append(file_path)
-                            debug_print(file_path)
-        return file_list
+                uri_rel = self.cdt_prj.LINKED_NAMES.get(uri_dir, '')
+                if not (uri_rel and is_excluded(uri_rel)):
+                    candidates.append((uri_dir, uri_rel, False))
+
+        roots = {}  # real path -> (directory, resource path, below PROJECT_DIR), the first of equal directories wins
+        for search_dir, search_rel, in_project in candidates:
+            roots.setdefault(os.path.realpath(search_dir), (search_dir, search_rel, in_project))
+        search_roots = []
+        for real_dir, (search_dir, search_rel, in_project) in roots.items():
+            prefix = real_dir.rstrip(os.sep) + os.sep
+            nested_dirs = set(other_dir for other_dir in roots.keys() if other_dir.startswith(prefix))
+            search_roots.append((search_dir, search_rel, in_project, real_dir, nested_dirs))
+        return search_roots
+
+    def _walk_root(self, search_root: Tuple[str, str, bool, str, Set[str]], is_c2000: bool, prune_name_match,
+                   prune_paths: Set[str], is_excluded) -> Tuple[List[str], List[str], int, int]:
+        # sort every file of a search root into sources and libraries
+        # returns (source files, library files, directories visited, files considered)
+        src_files = []
+        lib_files = []
+        counts = [0, 0]
+        for file, file_path in self._iter_root(search_root, prune_name_match, prune_paths, is_excluded, counts):
+            self._sort_file(file, file_path, is_c2000, src_files, lib_files, True)
+        return src_files, lib_files, counts[0], counts[1]
+
+    def _iter_root(self, search_root: Tuple[str, str, bool, str, Set[str]], prune_name_match, prune_paths: Set[str],
+                   is_excluded, counts: List[int]):
+        # (file name, path) of every file of a search root that is not excluded, without entering pruned or
+        # excluded directories (prune paths only apply below PROJECT_DIR, exclusions use resource paths) or other
+        # roots; counts: [directories visited, files considered], updated while walking
+        search_dir, search_rel, in_project, real_dir, nested_dirs = search_root
+        # a linked folder outside the project is listed from the shared index (by real path), if any, which first
+        # validates the directories this walk enters
+        shared = not in_project and self.shared_index is not None
+        if shared:
+            def walk(list_dir):
+                for walked in self._iter_dirs(search_root, prune_name_match, prune_paths, is_excluded, list_dir, True):
+                    pass
+
+            list_dir = self.shared_index.get(real_dir, walk).list_dir
+        else:
+            list_dir = self.dir_index.list_dir
+        for root, root_rel, files in self._iter_dirs(search_root, prune_name_match, prune_paths, is_excluded, list_dir,
+                                                     shared):
+            counts[0] += 1
+            counts[1] += len(files)
+            for file in files:
+                if not is_excluded(f'{root_rel}/{file}' if root_rel else file):
+                    yield file, os.path.join(root, file)
 
-    def get_lib_files(self, config: config_info, current_target_name: str, search_dir_arg: str = None) -> List[str]:
+    @staticmethod
+    def _iter_dirs(search_root: Tuple[str, str, bool, str, Set[str]], prune_name_match, prune_paths: Set[str],
+                   is_excluded, list_dir, real_paths: bool):
+        # (directory, resource path, file names) of every directory of a search root the walk enters, listed by
+        # list_dir (real_paths: given the real path of the directory)
+        search_dir, search_rel, in_project, real_dir, nested_dirs = search_root
+        # symbolic links to directories are not followed, so the real path of a sub directory is a plain join
+        dir_stack = [(search_dir, search_rel, real_dir)]
+        while dir_stack:
+            root, root_rel, real_root = dir_stack.pop()
+            files, dir_names = list_dir(real_root if real_paths else root)
+            yield root, root_rel, files
+            for dir_name in dir_names:
+                if prune_name_match(dir_name):
+                    continue
+                sub_rel = f'{root_rel}/{dir_name}' if root_rel else dir_name
+                if (in_project and sub_rel in prune_paths) or is_excluded(sub_rel):
+                    continue
+                real_sub = os.path.join(real_root, dir_name)
+                if real_sub in nested_dirs:
+                    continue  # walked as a root of its own
+                dir_stack.append((os.path.join(root, dir_name), sub_rel, real_sub))
+
+    def iter_scan_files(self, config: config_info, search_dir_arg: str = None):
+        # scan_files as a stream: (file path, is source, is library) in the order found, each file once, keeping
+        # only the paths seen so far (no lists, no sorting, no shared scan result)
         config_info = config['config_info']
         if search_dir_arg is None:
             search_dir_arg = config['PROJECT_DIR']
-        is_c2000 = 'C2000' in config_info.TARGETPLATFORM.get('superClass')
+        is_c2000 = 'C2000' in config_info.TARGETPLATFORM.superClass
+        prune_names, prune_paths = self.get_prune_rules(config)
+        is_excluded = self.get_exclude_matcher(config).match
+        prune_name_match = re.compile('|'.join(fnmatch.translate(name) for name in prune_names)).match
+
+        linked_files = [uri for uri in self.cdt_prj.SRCS if not uri.startswith('@linkedResources://')]
+        counts = [0, len(linked_files)]
+        files_kept = 0
+        # the search roots are distinct real directories, each walked once: a file can only be found twice as a
+        # linked file and again by the walk, so the linked files are the whole de-duplication set
+        seen = set()
+        for uri in linked_files:
+            if not is_excluded(self.cdt_prj.LINKED_NAMES.get(uri, '')):
+                is_src, is_lib = self._file_kind(uri, is_c2000)
+                key = os.path.normpath(self.expand_variable(uri))
+                if (is_src or is_lib) and key not in seen:
+                    seen.add(key)
+                    files_kept += 1
+                    yield uri, is_src, is_lib
+        for search_root in self.get_search_roots(search_dir_arg, is_excluded):
+            for file, file_path in self._iter_root(search_root, prune_name_match, prune_paths, is_excluded, counts):
+                is_src, is_lib = self._file_kind(file, is_c2000)
+                if (is_src or is_lib) and (len(seen) == 0 or os.path.normpath(file_path) not in seen):
+                    files_kept += 1
+                    yield norm_path(file_path), is_src, is_lib
+        STATS.count('dirs_visited', counts[0])
+        STATS.count('files_considered', counts[1])
+        STATS.count('files_kept', files_kept)
 
-        # file_list = self.cdt_prj.SRCS
-        file_list = []
-        search_dirs = [search_dir_arg]
+    @staticmethod
+    def _unique_sorted(file_paths: List[str]) -> List[str]:
+        unique = {}
+        for file_path in file_paths:
+            unique.setdefault(os.path.normpath(file_path), file_path)
+        return sorted(unique.values())
 
-        for uri in self.cdt_prj.SRCS:
-            if uri.startswith('@linkedResources://'):
-                uri_dir = uri[len('@linkedResources://'):]
-                search_dirs.append(uri_dir)
-            else:
-                file = uri
-                if file.endswith('.a') or file.endswith('.lib') or (is_c2000 and file.endswith('.cmd')):
-                    file_list.append(file)
-
-        for search_dir in search_dirs:
-            # start walk dir into search_dir and gether files with ['.a', '.lib'] extention
-            for root, dirs, files in os.walk(search_dir):
-                for file in files:
-                    if file.endswith('.a') or file.endswith('.lib') or (is_c2000 and file.endswith('.cmd')):
-                        if "CMake" not in file and "CompilerId." not in file:
-                            file_path = Path(root, file)
-                            file_path = norm_path(file_path)
-                            file_list.append(file_path)
-                            debug_print(file_path)
-        return file_list
+    @staticmethod
+    def _file_kind(file: str, is_c2000: bool) -> Tuple[bool, bool]:
+        # (is a target source, is a link input); C2000 linker command files are both
+        is_cmd = is_c2000 and file.endswith(CMD_FILE_EXT)
+        return file.endswith(SRC_FILE_EXTS) or is_cmd, file.endswith(LIB_FILE_EXTS) or is_cmd
+
+    @classmethod
+    def _sort_file(cls, file: str, file_path: str, is_c2000: bool, src_files: List[str], lib_files: List[str], normalize: bool = False) -> None:
+        is_src, is_lib = cls._file_kind(file, is_c2000)
+        if is_src or is_lib:
+            if normalize:
+                file_path = norm_path(file_path)
+                debug_print(file_path)
+            if is_src:
+                src_files.append(file_path)
+            if is_lib:
+                lib_files.append(file_path)
 
     def generate(self, config_name: str, outfile) -> None:
         config = self.cdt_prj.configs.get(config_name)
-        self.gether_vaiable(config)
-
-        config_info = config['config_info']
         current_target_name = config['PROJECT_NAME']
 
         outfile.write('cmake_minimum_required(VERSION 3.18)\n')
+        self.generate_prologue(config_name, outfile)
+        self.generate_project(current_target_name, outfile)
+        self.generate_body(config_name, outfile)
+        outfile.write('\n')
+        outfile.write('# [EOF]')
+        outfile.write('\n')
+
+    def generate_all(self, config_names: List[str], outfile, jobs: int = None) -> None:
+        # every configuration in one file, selected by CMAKE_BUILD_TYPE
+        config_names = list(config_names)
+        current_target_name = self.cdt_prj.PROJECT_NAME
+        prologues, bodies = self.render_configs(config_names, jobs)
 
-        # print(config_info.TOOLCHAIN_OPTIONS.get('OPT_CODEGEN_VERSION_DICT'))
-        # print(config_info.TARGETPLATFORM.get('superClass'))
-        if config_info.TARGETPLATFORM.get('superClass'):
+        outfile.write('cmake_minimum_required(VERSION 3.18)\n')
+        self._write_config_selection(config_names, outfile)
+        self._write_config_blocks(config_names, prologues, outfile)
+        self.generate_project(current_target_name, outfile)
+        self._write_config_blocks(config_names, bodies, outfile)
+        outfile.write('\n')
+        outfile.write('# [EOF]')
+        outfile.write('\n')
+
+    def generate_fragmented(self, config_names: List[str], outfile) -> None:
+        # the CMakeLists.txt of the fragments layout: includes the fragments of the configuration (the only one,
+        # or selected by CMAKE_BUILD_TYPE), so it stays unchanged while sources and settings change
+        current_target_name = self.cdt_prj.PROJECT_NAME
+        outfile.write('cmake_minimum_required(VERSION 3.18)\n')
+        if len(config_names) > 1:
+            self._write_config_selection(config_names, outfile)
+            config_dir = '${CMAKE_BUILD_TYPE}'
+        else:
+            config_dir = config_names[0]
+        outfile.write('\n')
+        outfile.write(f'set(CDT_FRAGMENTS_DIR "${{CMAKE_CURRENT_LIST_DIR}}/{FRAGMENTS_DIR_NAME}/{config_dir}")\n')
+        outfile.write('include("${CDT_FRAGMENTS_DIR}/prologue.cmake")\n')
+        self.generate_project(current_target_name, outfile)
+        outfile.write('\n')
+        for section in BODY_SECTIONS:
+            outfile.write(f'include("${{CDT_FRAGMENTS_DIR}}/{section}.cmake")\n')
+        outfile.write('\n')
+        outfile.write('# [EOF]')
+        outfile.write('\n')
+
+    def render_fragments(self, config_name: str) -> Dict[str, str]:
+        # section name (FRAGMENT_SECTIONS) -> content of the fragment of a configuration
+        outfiles = {section: io.StringIO() for section in FRAGMENT_SECTIONS}
+        # the fragments change under an already configured build directory: the cached flags are forced
+        self.generate_prologue(config_name, outfiles['prologue'], force_cache=True)
+        self.generate_sections(config_name, outfiles)
+        return {section: outfile.getvalue() for section, outfile in outfiles.items()}
+
+    @staticmethod
+    def _write_config_selection(config_names: List[str], outfile) -> None:
+        # CMAKE_BUILD_TYPE selects one of the configurations, the first one by default
+        outfile.write('\n')
+        config_list = ';'.join(config_names)
+        outfile.write(f'set(CDT_CONFIGURATIONS {quote_path(config_list, True)})\n')
+        outfile.write('if(NOT CMAKE_BUILD_TYPE)\n')
+        outfile.write(f'\tset(CMAKE_BUILD_TYPE {quote_path(config_names[0], True)} CACHE STRING "" FORCE)\n')
+        outfile.write('endif()\n')
+        outfile.write('set_property(CACHE CMAKE_BUILD_TYPE PROPERTY STRINGS ${CDT_CONFIGURATIONS})\n')
+        outfile.write('if(NOT CMAKE_BUILD_TYPE IN_LIST CDT_CONFIGURATIONS)\n')
+        outfile.write('\tmessage(FATAL_ERROR "CMAKE_BUILD_TYPE must be one of: ${CDT_CONFIGURATIONS}")\n')
+        outfile.write('endif()\n')
+
+    def render_configs(self, config_names: List[str], jobs: int = None) -> Tuple[List[str], List[str]]:
+        # (prologue, body) of every configuration, rendered concurrently on top of the shared scan
+        def render(config_name):
+            prologue = io.StringIO()
+            body = io.StringIO()
+            self.generate_prologue(config_name, prologue, force_cache=len(config_names) > 1)
+            self.generate_body(config_name, body)
+            return prologue.getvalue(), body.getvalue()
+
+        if jobs == 1 or len(config_names) < 2:
+            rendered = [render(config_name) for config_name in config_names]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                rendered = list(executor.map(render, config_names))
+        return [prologue for prologue, body in rendered], [body for prologue, body in rendered]
+
+    @staticmethod
+    def _write_config_blocks(config_names: List[str], blocks: List[str], outfile) -> None:
+        if not any(block.strip() for block in blocks):
+            return
+        outfile.write('\n')
+        for index, (config_name, block) in enumerate(zip(config_names, blocks)):
+            keyword = 'if' if index == 0 else 'elseif'
+            outfile.write(f'{keyword}(CMAKE_BUILD_TYPE STREQUAL {quote_path(config_name, True)})')
+            outfile.write(block.rstrip('\n'))
+            outfile.write('\n')
+        outfile.write('endif()\n')
+
+    @staticmethod
+    def get_c2000_compile_flags(config_info: 'Configuration') -> List[str]:
+        # the TI C2000 compiler flags of the configuration (CMAKE_C2000_DEFAULT_COMPILE_FLAGS)
+        c2000_opt_dict = {}
+        c2000_opt_lines = []
+        for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
+            c2000_opt_dict['LARGE_MEMORY_MODEL'] = (tool_options.get('LARGE_MEMORY_MODEL') or "true") == 'true'
+            c2000_opt_dict['UNIFIED_MEMORY'] = (tool_options.get('UNIFIED_MEMORY') or "true") == 'true'
+            c2000_opt_dict['SILICON_VERSION'] = (tool_options.get('SILICON_VERSION') or "SILICON_VERSION.28").split('.')[-1]
+            if tool_options.get('FLOAT_SUPPORT') is not None:
+                c2000_opt_dict['FLOAT_SUPPORT'] = (tool_options.get('FLOAT_SUPPORT') or "FLOAT_SUPPORT.fpu32").split('.')[-1]
+            if tool_options.get('CLA_SUPPORT') is not None:
+                c2000_opt_dict['CLA_SUPPORT'] = (tool_options.get('CLA_SUPPORT') or "CLA_SUPPORT.cla1").split('.')[-1]
+            if tool_options.get('VCU_SUPPORT') is not None:
+                c2000_opt_dict['VCU_SUPPORT'] = (tool_options.get('VCU_SUPPORT') or "VCU_SUPPORT.vcu2").split('.')[-1]
+            if tool_options.get('TMU_SUPPORT') is not None:
+                c2000_opt_dict['TMU_SUPPORT'] = (tool_options.get('TMU_SUPPORT') or "TMU_SUPPORT.tmu0").split('.')[-1]
+            if tool_options.get('OPT_LEVEL') is not None:
+                c2000_opt_dict['OPT_LEVEL'] = (tool_options.get('OPT_LEVEL') or "OPT_LEVEL.0").split('.')[-1]
+            if tool_options.get('OPT_FOR_SPEED') is not None:
+                c2000_opt_dict['OPT_FOR_SPEED'] = (tool_options.get('OPT_FOR_SPEED') or "OPT_FOR_SPEED.2").split('.')[-1]
+            if tool_options.get('FP_MODE') is not None:
+                c2000_opt_dict['FP_MODE'] = (tool_options.get('FP_MODE') or "FP_MODE.relaxed").split('.')[-1]
+            if tool_options.get('CLA_SIGNED_COMPARE_WORKAROUND') is not None:
+                c2000_opt_dict['CLA_SIGNED_COMPARE_WORKAROUND'] = (tool_options.get('CLA_SIGNED_COMPARE_WORKAROUND') or ".").split('.')[-1]
+            for k, v in c2000_opt_dict.items():
+                if v is True:
+                    c2000_opt_lines.append("--{0}".format(k.lower()))
+                else:
+                    c2000_opt_lines.append("--{0}={1}".format(k.lower(), str(v).lower()))
+            # end of for loop
+        # end of for loop
+        return c2000_opt_lines
+
+    @timed('render')
+    def generate_prologue(self, config_name: str, outfile, force_cache: bool = False) -> None:
+        # toolchain settings that have to be known before project(); force_cache when the build directory may be
+        # configured again for another configuration (the cached flags would otherwise keep the first values)
+        cache = 'CACHE STRING "" FORCE' if force_cache else 'CACHE STRING ""'
+        config = self.cdt_prj.configs.get(config_name)
+        self.gether_vaiable(config)
+
+        config_info = config['config_info']
+
+        # print(config_info.TOOLCHAIN_OPTIONS.options.get('OPT_CODEGEN_VERSION'))
+        # print(config_info.TARGETPLATFORM.superClass)
+        if config_info.TARGETPLATFORM.superClass:
             OPT_CODEGEN_VERSION = config_info.TOOLCHAIN_OPTIONS.get('OPT_CODEGEN_VERSION')
             if OPT_CODEGEN_VERSION is None:
                 OPT_CODEGEN_VERSION = 'unknown_version'
-            if 'C2000' in config_info.TARGETPLATFORM.get('superClass'):
-                c2000_opt_dict = {}
-                c2000_opt_lines = []
-                for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
-                    c2000_opt_dict['LARGE_MEMORY_MODEL'] = (tool_options.get('LARGE_MEMORY_MODEL') or "true") == 'true'
-                    c2000_opt_dict['UNIFIED_MEMORY'] = (tool_options.get('UNIFIED_MEMORY') or "true") == 'true'
-                    c2000_opt_dict['SILICON_VERSION'] = (tool_options.get('SILICON_VERSION') or "SILICON_VERSION.28").split('.')[-1]
-                    if tool_options.get('FLOAT_SUPPORT') is not None:
-                        c2000_opt_dict['FLOAT_SUPPORT'] = (tool_options.get('FLOAT_SUPPORT') or "FLOAT_SUPPORT.fpu32").split('.')[-1]
-                    if tool_options.get('CLA_SUPPORT') is not None:
-                        c2000_opt_dict['CLA_SUPPORT'] = (tool_options.get('CLA_SUPPORT') or "CLA_SUPPORT.cla1").split('.')[-1]
-                    if tool_options.get('VCU_SUPPORT') is not None:
-                        c2000_opt_dict['VCU_SUPPORT'] = (tool_options.get('VCU_SUPPORT') or "VCU_SUPPORT.vcu2").split('.')[-1]
-                    if tool_options.get('TMU_SUPPORT') is not None:
-                        c2000_opt_dict['TMU_SUPPORT'] = (tool_options.get('TMU_SUPPORT') or "TMU_SUPPORT.tmu0").split('.')[-1]
-                    if tool_options.get('OPT_LEVEL') is not None:
-                        c2000_opt_dict['OPT_LEVEL'] = (tool_options.get('OPT_LEVEL') or "OPT_LEVEL.0").split('.')[-1]
-                    if tool_options.get('OPT_FOR_SPEED') is not None:
-                        c2000_opt_dict['OPT_FOR_SPEED'] = (tool_options.get('OPT_FOR_SPEED') or "OPT_FOR_SPEED.2").split('.')[-1]
-                    if tool_options.get('FP_MODE') is not None:
-                        c2000_opt_dict['FP_MODE'] = (tool_options.get('FP_MODE') or "FP_MODE.relaxed").split('.')[-1]
-                    if tool_options.get('CLA_SIGNED_COMPARE_WORKAROUND') is not None:
-                        c2000_opt_dict['CLA_SIGNED_COMPARE_WORKAROUND'] = (tool_options.get('CLA_SIGNED_COMPARE_WORKAROUND') or ".").split('.')[-1]
-                    for k, v in c2000_opt_dict.items():
-                        if v is True:
-                            c2000_opt_lines.append("--{0}".format(k.lower()))
-                        else:
-                            c2000_opt_lines.append("--{0}={1}".format(k.lower(), str(v).lower()))
-                    # end of for loop
-                # end of for loop
+            if 'C2000' in config_info.TARGETPLATFORM.superClass:
+                c2000_opt_lines = self.get_c2000_compile_flags(config_info)
                 if len(c2000_opt_lines) > 0:
-                    outfile.write('\nset(CMAKE_C2000_DEFAULT_COMPILE_FLAGS "{0}" CACHE STRING "")'.format(' '.join(c2000_opt_lines)))
+                    outfile.write('\nset(CMAKE_C2000_DEFAULT_COMPILE_FLAGS "{0}" {1})'.format(' '.join(c2000_opt_lines), cache))
+                elif force_cache:
+                    outfile.write('\nunset(CMAKE_C2000_DEFAULT_COMPILE_FLAGS CACHE)')
 
                 c2000_linker_opt_dict = {}
                 c2000_linker_opt_lines = []
@@ -429,181 +1838,1110 @@ class cmake_generator:
                     # end of for loop
                 # end of for loop
                 if len(c2000_linker_opt_lines) > 0:
-                    outfile.write('\nset(CMAKE_C2000_LINKER_STACK_SIZE_HEAP_SIZE_FLAGS "{0}" CACHE STRING "")'.format(' '.join(c2000_linker_opt_lines)))
+                    outfile.write('\nset(CMAKE_C2000_LINKER_STACK_SIZE_HEAP_SIZE_FLAGS "{0}" {1})'.format(' '.join(c2000_linker_opt_lines), cache))
+                elif force_cache:
+                    outfile.write('\nunset(CMAKE_C2000_LINKER_STACK_SIZE_HEAP_SIZE_FLAGS CACHE)')
 
                 outfile.write('\n')
                 outfile.write(f'set(CG_TOOL_ROOT_HINT "C:/ti/ccsv7/tools/compiler/ti-cgt-c2000_{OPT_CODEGEN_VERSION}")\n')
                 # outfile.write('set(TI_CGT_C2000_DIR ${CG_TOOL_ROOT} CACHE STRING "")\n')
 
+    @timed('render')
+    def generate_project(self, current_target_name: str, outfile) -> None:
         outfile.write('\n')
         outfile.write(f'project({current_target_name} C CXX ASM)\n')
         outfile.write('\n')
-        outfile.write(f'set(PROJECT_DIR ${{CMAKE_CURRENT_LIST_DIR}}/{quote_path(self.cdt_prj.PROJECT_DIR)})\n')
+        outfile.write(f'set(PROJECT_DIR ${{CMAKE_CURRENT_LIST_DIR}}/{quote_path(self.get_project_dir_ref())})\n')
         # outfile.write('\n')
         # outfile.write("if(CMAKE_TOOLCHAIN_FILE)\n")
         # outfile.write("\tinclude(${CMAKE_TOOLCHAIN_FILE})\n")
         # outfile.write("endif(CMAKE_TOOLCHAIN_FILE)\n")
 
-        SRC_FILES = self.get_src_files(config, current_target_name)
-        LIB_FILES = self.get_lib_files(config, current_target_name)
+    def generate_body(self, config_name: str, outfile) -> None:
+        self.generate_sections(config_name, {section: outfile for section in BODY_SECTIONS})
+
+    @timed('render')
+    def generate_sections(self, config_name: str, outfiles: Dict) -> None:
+        # the body of a configuration, every section (BODY_SECTIONS) written to its own outfile
+        config = self.cdt_prj.configs.get(config_name)
+        self.gether_vaiable(config)
 
-        if SRC_FILES is not None and len(SRC_FILES) > 0:
-            outfile.write(f'\nadd_executable({current_target_name}')
-            for src_file in SRC_FILES:
-                src_file = norm_path(self.expand_variable(src_file))
-                src_file = self.path_from_file_item(src_file)
-                outfile.write(f"\n\t{src_file}")
+        lib_files = []
+        src_paths = [] if self.acceleration.unity_batch_size else None  # kept only for unity batching
+        # the fileInfo overrides only apply to the files the scan puts in the source list
+        file_properties = self.get_file_properties(config)
+        listed = dict.fromkeys((file_path for file_paths, properties in file_properties for file_path in file_paths), False)
+        if self.generate_sources(config, lib_files, src_paths, outfiles['sources'], listed) > 0:
+            self.generate_definitions(config, outfiles['definitions'])
+            self.generate_includes(config, outfiles['includes'])
+            self.generate_link(config, lib_files, outfiles['link'])
+            file_properties = [([file_path for file_path in file_paths if listed[file_path]], properties)
+                               for file_paths, properties in file_properties]
+            self.generate_properties(config, src_paths, outfiles['properties'],
+                                     [(file_paths, properties) for file_paths, properties in file_properties if file_paths])
+
+    def generate_sources(self, config: config_info, lib_files: List[str], src_paths: List[str], outfile,
+                         listed: Dict[str, bool] = None) -> int:
+        # sources are written as they come (streamed from the scan without sort_files), the target is only
+        # emitted when there is at least one; returns the number of sources; the paths of listed found among
+        # the sources are set to True
+        current_target_name = config['PROJECT_NAME']
+        src_count = 0
+        for src_file in self.iter_src_files(config, lib_files):
+            src_path = self.path_from_file_item(norm_path(self.expand_variable(src_file, self.sort_files)))
+            if src_count == 0:
+                if self.is_library(config):
+                    outfile.write(f'\nadd_library({current_target_name} STATIC')
+                else:
+                    outfile.write(f'\nadd_executable({current_target_name}')
+            outfile.write(f"\n\t{src_path}")
+            src_count += 1
+            if src_paths is not None:
+                src_paths.append(src_path)
+            if listed is not None and src_path in listed:
+                listed[src_path] = True
+
+        if src_count > 0:
             outfile.write('\n)\n')
+        return src_count
 
-            outstrlist = []
-            for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
-                for item in (tool_options.get('symbols_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = self.expand_variable(item_val)
-                    outstrlist.append(f"{item_str}")
-                for item in (tool_options.get('DEFINE_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = self.expand_variable(item_val)
-                    outstrlist.append(f"{item_str}")
-            if len(outstrlist) > 0:
-                outfile.write(f"\ntarget_compile_definitions({current_target_name} PUBLIC\n\t")
-                outfile.write('\n\t'.join(outstrlist))
-                outfile.write('\n)\n')
+    def generate_definitions(self, config: config_info, outfile) -> None:
+        config_info = config['config_info']
+        current_target_name = config['PROJECT_NAME']
+        outstrlist = []
+        for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
+            for item_val in tool_options.values('symbols'):
+                item_str = self.expand_variable(item_val)
+                outstrlist.append(f"{item_str}")
+            for item_val in tool_options.values('DEFINE'):
+                item_str = self.expand_variable(item_val)
+                outstrlist.append(f"{item_str}")
+        if len(outstrlist) > 0:
+            outfile.write(f"\ntarget_compile_definitions({current_target_name} PUBLIC\n\t")
+            outfile.write('\n\t'.join(outstrlist))
+            outfile.write('\n)\n')
 
-            outstrlist = []
-            for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
-                for item in (tool_options.get('paths_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = norm_path(self.expand_variable(item_val))
-                    outstrlist.append(self.path_from_dir_item(item_str))
-                for item in (tool_options.get('INCLUDE_PATH_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = norm_path(self.expand_variable(item_val))
-                    outstrlist.append(self.path_from_dir_item(item_str))
-            if len(outstrlist) > 0:
-                outfile.write(f"\ntarget_include_directories({current_target_name} PUBLIC\n\t")
-                outfile.write('\n\t'.join(outstrlist))
-                outfile.write('\n)\n')
+    def generate_includes(self, config: config_info, outfile) -> None:
+        config_info = config['config_info']
+        current_target_name = config['PROJECT_NAME']
+        outstrlist = []
+        for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
+            for item_val in tool_options.values('paths'):
+                item_str = norm_path(self.expand_variable(item_val))
+                outstrlist.append(self.path_from_dir_item(item_str))
+            for item_val in tool_options.values('INCLUDE_PATH'):
+                item_str = norm_path(self.expand_variable(item_val))
+                outstrlist.append(self.path_from_dir_item(item_str))
+        if len(outstrlist) > 0:
+            outfile.write(f"\ntarget_include_directories({current_target_name} PUBLIC\n\t")
+            outfile.write('\n\t'.join(outstrlist))
+            outfile.write('\n)\n')
 
-            outstrlist = []
-            for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
-                for item in (tool_options.get('DEFINE_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = self.expand_variable(item_val)
-                    outstrlist.append(f"--define={item_str}")
-            for tool_id, tool_options in config_info.LINKER_OPTIONS.items():
-                for item in (tool_options.get('DEFINE_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = self.expand_variable(item_val)
-                    outstrlist.append(f"--define={item_str}")
-            if len(outstrlist) > 0:
-                outfile.write(f"\ntarget_link_options({current_target_name} PUBLIC\n\t")
-                outfile.write('\n\t'.join(outstrlist))
-                outfile.write('\n)\n')
+    def generate_link(self, config: config_info, lib_files: List[str], outfile) -> None:
+        # link options, search paths, libraries (lib_files: the scanned ones) and referenced projects
+        config_info = config['config_info']
+        current_target_name = config['PROJECT_NAME']
+        outstrlist = []
+        for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
+            for item_val in tool_options.values('DEFINE'):
+                item_str = self.expand_variable(item_val)
+                outstrlist.append(f"--define={item_str}")
+        for tool_id, tool_options in config_info.LINKER_OPTIONS.items():
+            for item_val in tool_options.values('DEFINE'):
+                item_str = self.expand_variable(item_val)
+                outstrlist.append(f"--define={item_str}")
+        if len(outstrlist) > 0:
+            outfile.write(f"\ntarget_link_options({current_target_name} PUBLIC\n\t")
+            outfile.write('\n\t'.join(outstrlist))
+            outfile.write('\n)\n')
 
-            outstrlist = []
-            for tool_id, tool_options in config_info.LINKER_OPTIONS.items():
-                for item in (tool_options.get('paths_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = norm_path(self.expand_variable(item_val))
-                    outstrlist.append(self.path_from_dir_item(item_str))
-                for item in (tool_options.get('SEARCH_PATH_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = norm_path(self.expand_variable(item_val))
-                    outstrlist.append(self.path_from_dir_item(item_str))
-            if len(outstrlist) > 0:
-                outfile.write(f"\ntarget_link_directories({current_target_name} PUBLIC\n\t")
-                outfile.write('\n\t'.join(outstrlist))
-                outfile.write('\n)\n')
+        outstrlist = []
+        for tool_id, tool_options in config_info.LINKER_OPTIONS.items():
+            for item_val in tool_options.values('paths'):
+                item_str = norm_path(self.expand_variable(item_val))
+                outstrlist.append(self.path_from_dir_item(item_str))
+            for item_val in tool_options.values('SEARCH_PATH'):
+                item_str = norm_path(self.expand_variable(item_val))
+                outstrlist.append(self.path_from_dir_item(item_str))
+        if len(outstrlist) > 0:
+            outfile.write(f"\ntarget_link_directories({current_target_name} PUBLIC\n\t")
+            outfile.write('\n\t'.join(outstrlist))
+            outfile.write('\n)\n')
 
-            outstrlist = []
-            for tool_id, tool_options in config_info.LINKER_OPTIONS.items():
-                for item in (tool_options.get('input_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = norm_path(self.expand_variable(item_val))
-                    outstrlist.append(self.path_from_file_item(item_str))
-                for item in (tool_options.get('LIBRARY_SUBITEMS') or []):
-                    item_val = item['value']
-                    item_str = norm_path(self.expand_variable(item_val))
-                    outstrlist.append(self.path_from_file_item(item_str))
-                for item in LIB_FILES:
-                    item_str = norm_path(self.expand_variable(item))
-                    outstrlist.append(self.path_from_file_item(item_str))
-            # process exclude list
-            for exclude_info in config_info.EXCLUDE_INFO:
-                for exclude_item in exclude_info['exclude_item_list']:
-                    if len(exclude_item) > 0:
-                        outstrlist = list(filter(lambda x: not x.endswith(exclude_item), outstrlist))
-            if 'C2000' in config_info.TARGETPLATFORM.get('superClass'):
-                libc_found = False
-                for item in outstrlist:
-                    if "libc.a" in item:
+        # one pass over the link inputs: the exclusions (the scanned lib_files are already filtered while
+        # scanning, only the linker options are matched here) and, for C2000, libc.a
+        is_excluded = self.get_exclude_matcher(config).match
+        is_c2000 = 'C2000' in config_info.TARGETPLATFORM.superClass
+        libc_found = False
+        outstrlist = []
+        for tool_id, tool_options in config_info.LINKER_OPTIONS.items():
+            for items, from_options in ((tool_options.values('input'), True), (tool_options.values('LIBRARY'), True),
+                                        (lib_files, False)):
+                for item_val in items:
+                    item_path = norm_path(self.expand_variable(item_val))
+                    if from_options:
+                        resource_path = self.get_resource_path(unquote_path(item_path))
+                        if resource_path is not None and is_excluded(resource_path):
+                            continue
+                    item_str = self.path_from_file_item(item_path)
+                    if is_c2000 and "libc.a" in item_str:
                         libc_found = True
-                        break
-                if libc_found:
-                    outstrlist = list(filter(lambda item: "libc.a" not in item, outstrlist))
-                    outstrlist.append("--library=libc.a # HACK: (TI-Compiler) This is a way to attempt searching for libc.a in the library path.")
-            if len(outstrlist) > 0:
-                outfile.write(f"\ntarget_link_libraries({current_target_name} PUBLIC\n\t")
-                outfile.write('\n\t'.join(outstrlist))
-                outfile.write('\n)\n')
+                        continue
+                    outstrlist.append(item_str)
+        if libc_found:
+            outstrlist.append("--library=libc.a # HACK: (TI-Compiler) This is a way to attempt searching for libc.a in the library path.")
+        if len(outstrlist) > 0:
+            outfile.write(f"\ntarget_link_libraries({current_target_name} PUBLIC\n\t")
+            outfile.write('\n\t'.join(outstrlist))
+            outfile.write('\n)\n')
 
-            outstrlist = []
-            for file_resource_path, file_options in config_info.FILEINFO.items():
-                # print(file_resource_path, file_options)
-                file_path = self.cdt_prj.RESOURCE_MAP.get(file_resource_path)
-                if file_path is None:
-                    continue
-                tool_options = file_options.get('COMPILER_OPTIONS') or {}
-                for file_tool_id, file_tool_options in tool_options.items():
-                    # print(file_tool_options)
-                    for item in (file_tool_options.get('symbols_SUBITEMS') or []):
-                        item_val = item['value']
-                        item_str = self.expand_variable(item_val)
-                        outstrlist.append(f"{item_str}")
-                    for item in (file_tool_options.get('DEFINE_SUBITEMS') or []):
-                        item_val = item['value']
-                        item_str = self.expand_variable(item_val)
-                        outstrlist.append(f"{item_str}")
-            if len(outstrlist) > 0:
-                outfile.write(f"\nset_source_files_properties({file_path} PROPERTIES COMPILE_DEFINITIONS\n")
-                outfile.write('\t"')
-                outfile.write(';'.join(outstrlist).replace('"', '\\"'))
-                outfile.write('"\n)\n')
-
-            if 'C2000' in config_info.TARGETPLATFORM.get('superClass'):
-                outfile.write('\n')
-                outfile.write('set(CMAKE_LIBRARY_PATH_FLAG "--search_path=")\n')
-                outfile.write('set(CMAKE_LINK_LIBRARY_FLAG "--library=")\n')
+        referenced_projects = self.get_referenced_project_dirs()
+        if len(referenced_projects) > 0:
+            outfile.write('\n')
+            for project_name, project_dir in referenced_projects:
+                project_rel_dir = Path(os.path.relpath(project_dir, self.cdt_prj.PROJECT_DIR)).as_posix()
+                if self.config_subdirs:
+                    project_rel_dir += '/' + config['name']
+                outfile.write(f"if(NOT TARGET {project_name})\n")
+                outfile.write(f"\tadd_subdirectory({quote_path('${PROJECT_DIR}/' + project_rel_dir)} ${{CMAKE_BINARY_DIR}}/{project_name})\n")
+                outfile.write("endif()\n")
+            outfile.write(f"target_link_libraries({current_target_name} PUBLIC\n\t")
+            outfile.write('\n\t'.join(project_name for project_name, project_dir in referenced_projects))
+            outfile.write('\n)\n')
+
+    def generate_properties(self, config: config_info, src_paths: List[str], outfile,
+                            file_properties: List[Tuple[List[str], List[Tuple[str, List[str]]]]] = None) -> None:
+        # per file properties (file_properties: get_file_properties() of the target's sources), build acceleration
+        # (src_paths: the sources, for unity batching) and target settings
+        config_info = config['config_info']
+        current_target_name = config['PROJECT_NAME']
+        if file_properties is None:
+            file_properties = self.get_file_properties(config)
+        # per file overrides (fileInfo), one call for every set of files sharing the same overrides
+        for file_paths, properties in file_properties:
+            outfile.write('\nset_source_files_properties(')
+            for file_path in file_paths:
+                outfile.write(f"\n\t{file_path}")
+            outfile.write('\n\tPROPERTIES')
+            for property_name, values in properties:
+                value = ';'.join(values).replace('"', '\\"')
+                outfile.write(f'\n\t{property_name} "{value}"')
+            outfile.write('\n)\n')
+
+        if self.acceleration.enabled():
+            self.generate_build_acceleration(config, current_target_name, src_paths, outfile)
+
+        if 'C2000' in config_info.TARGETPLATFORM.superClass:
+            outfile.write('\n')
+            outfile.write('set(CMAKE_LIBRARY_PATH_FLAG "--search_path=")\n')
+            outfile.write('set(CMAKE_LINK_LIBRARY_FLAG "--library=")\n')
+            if not self.is_library(config):
                 outfile.write('\n')
                 outfile.write("if (COMMAND mark_as_target_executable)\n")
                 outfile.write(f"\tmark_as_target_executable({current_target_name})\n")
                 outfile.write("endif(COMMAND mark_as_target_executable)\n")
 
-            #
-        #
-        outfile.write('\n')
-        outfile.write('# [EOF]')
-        outfile.write('\n')
+    def generate_build_acceleration(self, config: config_info, current_target_name: str, src_paths: List[str], outfile) -> None:
+        # opt-in build speed settings of a target (see build_acceleration), aware of what TI compilers support
+        acceleration = self.acceleration
+        is_ti = self.is_ti_toolchain(config)
+        outfile.write('\n# build acceleration\n')
+
+        if acceleration.unity_batch_size:
+            # only C/C++ sources are batched: assembly, CLA sources and linker command files never are
+            unity_paths = [src_path for src_path in src_paths if unquote_path(src_path).endswith(UNITY_FILE_EXTS)]
+            skip_paths = [src_path for src_path in src_paths if not unquote_path(src_path).endswith(UNITY_FILE_EXTS)]
+            if acceleration.unity_group_by_dir:
+                outfile.write(f'set_target_properties({current_target_name} PROPERTIES UNITY_BUILD ON UNITY_BUILD_MODE GROUP)\n')
+                dir_paths = {}
+                for src_path in unity_paths:
+                    dir_paths.setdefault(os.path.dirname(unquote_path(src_path)), []).append(src_path)
+                for dir_path, paths in dir_paths.items():
+                    group_name = re.sub(r'\W+', '_', dir_path.replace('${PROJECT_DIR}', '')).strip('_') or 'root'
+                    for batch_index in range(0, len(paths), acceleration.unity_batch_size):
+                        batch = paths[batch_index:batch_index + acceleration.unity_batch_size]
+                        outfile.write('set_source_files_properties(\n\t')
+                        outfile.write('\n\t'.join(batch))
+                        outfile.write(f'\n\tPROPERTIES UNITY_GROUP "{group_name}_{batch_index // acceleration.unity_batch_size}"\n)\n')
+            else:
+                outfile.write(f'set_target_properties({current_target_name} PROPERTIES UNITY_BUILD ON '
+                              f'UNITY_BUILD_BATCH_SIZE {acceleration.unity_batch_size})\n')
+            if len(skip_paths) > 0:
+                outfile.write('set_source_files_properties(\n\t')
+                outfile.write('\n\t'.join(skip_paths))
+                outfile.write('\n\tPROPERTIES SKIP_UNITY_BUILD_INCLUSION ON\n)\n')
+
+        if acceleration.ccache:
+            if is_ti:
+                outfile.write('# ccache: not supported by the TI compiler\n')
+            else:
+                outfile.write('find_program(CCACHE_PROGRAM ccache)\n')
+                outfile.write('if(CCACHE_PROGRAM)\n')
+                outfile.write(f'\tset_target_properties({current_target_name} PROPERTIES '
+                              'C_COMPILER_LAUNCHER "${CCACHE_PROGRAM}" CXX_COMPILER_LAUNCHER "${CCACHE_PROGRAM}")\n')
+                outfile.write('endif()\n')
+
+        if len(acceleration.pch_headers) > 0:
+            if is_ti:
+                outfile.write('# precompiled headers: not supported by the TI compiler\n')
+            else:
+                headers = []
+                for header in acceleration.pch_headers:
+                    if not header.startswith('<') and not os.path.isabs(header):
+                        header = self.path_from_file_item(norm_path(f'{self.cdt_prj.PROJECT_DIR}/{header}'))
+                    headers.append(header)
+                outfile.write(f"target_precompile_headers({current_target_name} PRIVATE\n\t")
+                outfile.write('\n\t'.join(headers))
+                outfile.write('\n)\n')
 
+        if acceleration.link_pool and is_ti:
+            # the TI linker is memory hungry and slow: one link (or archive) at a time, compiles stay parallel
+            outfile.write('get_property(CDT_JOB_POOLS GLOBAL PROPERTY JOB_POOLS)\n')
+            outfile.write(f'if(NOT "{TI_LINK_JOB_POOL}=1" IN_LIST CDT_JOB_POOLS)\n')
+            outfile.write(f'\tset_property(GLOBAL APPEND PROPERTY JOB_POOLS {TI_LINK_JOB_POOL}=1)\n')
+            outfile.write('endif()\n')
+            outfile.write(f'set_target_properties({current_target_name} PROPERTIES JOB_POOL_LINK {TI_LINK_JOB_POOL})\n')
+
+    @timed('render')
+    def generate_compile_commands(self, config_name: str, outfile) -> None:
+        # compile_commands.json of a configuration straight from the model, one entry per scanned source (with
+        # its fileInfo overrides) written as soon as it is built
+        import json
+        config = self.cdt_prj.configs.get(config_name)
+        self.gether_vaiable(config)
 
-def main():
-    if len(os.sys.argv) > 1 and len(os.sys.argv[1]) > 0:
-        PROJECT_DIR = os.sys.argv[1]
-    else:
-        PROJECT_DIR = "."
+        unset_names = set()  # variables neither the project nor the environment defines
+
+        def resolve(text: str) -> str:
+            # None (and the variable noted) when text still refers to an unset variable such as ${CG_TOOL_ROOT}
+            expanded = self.expand_environment(text)
+            if '${' in expanded:
+                unset_names.update(re.findall(r'\$\{([^${}]*)\}', expanded))
+                return None
+            return expanded
 
-    cdt_prj = cdt_project(PROJECT_DIR)
+        def resolve_all(arguments) -> List[str]:
+            return [argument for argument in map(resolve, arguments) if argument is not None]
 
-    # generate
-    outfile = open('CMakeLists.txt', "w")
-    # outfile = sys.stdout
+        config_info = config['config_info']
+        flags = [self.get_compiler_command(config)]
+        if 'C2000' in (config_info.TARGETPLATFORM.superClass or ''):
+            flags.extend(self.get_c2000_compile_flags(config_info))
+        for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
+            for key in ('symbols', 'DEFINE'):
+                flags.extend(f'-D{self.expand_variable(item_val)}' for item_val in tool_options.values(key))
+        for tool_id, tool_options in config_info.COMPILER_OPTIONS.items():
+            for key in ('paths', 'INCLUDE_PATH'):
+                flags.extend(f'-I{self.absolute_path(norm_path(self.expand_variable(item_val)))}'
+                             for item_val in tool_options.values(key))
+        flags = resolve_all(flags)
+        file_overrides = {}
+        for file_path, definitions, include_dirs, options in self.get_file_overrides(config):
+            file_path = resolve(file_path)
+            if file_path is not None:
+                file_overrides[self.absolute_path(file_path)] = (
+                    options + [f'-D{definition}' for definition in definitions]
+                    + [f'-I{self.absolute_path(include_dir)}' for include_dir in include_dirs])
+
+        directory = json.dumps(os.path.abspath(self.target_dir))
+        flags_json = json.dumps(flags)[:-1]  # encoded once, shared by the files without overrides
+        separator = '\n'
+        outfile.write('[')
+        for src_file in self.iter_src_files(config):
+            file_path = resolve(norm_path(self.expand_variable(src_file, self.sort_files)))
+            if file_path is None or file_path.endswith(CMD_FILE_EXT):
+                continue
+            file_path = self.absolute_path(file_path)
+            file_json = json.dumps(file_path)
+            overrides = file_overrides.get(file_path)
+            if overrides is None:
+                arguments_json = f'{flags_json}, "-c", {file_json}]'
+            else:
+                arguments_json = json.dumps(flags + resolve_all(overrides) + ['-c', file_path])
+            outfile.write(separator)
+            outfile.write(f'  {{"directory": {directory}, "file": {file_json}, "arguments": {arguments_json}}}')
+            separator = ',\n'
+        outfile.write('\n]\n')
+        if len(unset_names) > 0:
+            print(f"WARNING {COMPILE_COMMANDS_FILENAME}: arguments referring to unset variables left out: "
+                  f"{', '.join(sorted(unset_names))}", file=sys.stderr)
 
-    for config_name, config in cdt_prj.configs.items():
+    @staticmethod
+    def expand_environment(text: str) -> str:
+        # ${NAME} left by expand_variable (a CMake side variable such as ${CG_TOOL_ROOT}) from the environment
+        if '${' not in text:
+            return text
+        return re.sub(r'\$\{(\w+)\}', lambda match: os.environ.get(match.group(1), match.group(0)), text)
+
+
+@timed('write')
+def write_if_changed(path: str, content: str) -> bool:
+    # replace path atomically, and only when its content differs (keeps the mtime for CMake/Ninja)
+    data = content.replace('\n', os.linesep).encode()  # the bytes a text mode "w" write would produce
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    dir_name, file_name = os.path.split(path)
+    tmp_path = os.path.join(dir_name, f'.{file_name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+@timed('write')
+def write_stream_if_changed(path: str, write) -> bool:
+    # write_if_changed for output streamed by write(outfile) to a temporary file rather than built in memory
+    import filecmp
+    dir_name, file_name = os.path.split(path)
+    tmp_path = os.path.join(dir_name, f'.{file_name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as f:
+            write(f)
+        if os.path.isfile(path) and filecmp.cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def find_cdt_projects(workspace_dir: str) -> List[str]:
+    # every directory below workspace_dir holding both .project and .cproject
+    project_dirs = []
+    for root, dirs, files in os.walk(workspace_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORE_DIR_NAMES)
+        if '.project' in files and '.cproject' in files:
+            project_dirs.append(norm_path(root))
+            dirs[:] = [d for d in dirs if d not in BUILD_DIR_NAMES]
+    return project_dirs
+
+
+def convert_project(PROJECT_DIR: str, target_dir: str = '.', ignore_list: List[str] = None,
+                    project_dirs: Dict[str, str] = None, use_cache: bool = False,
+                    all_configs: bool = False, config_layout: str = 'blocks', jobs: int = None,
+                    config_names: List[str] = None, acceleration: build_acceleration = None,
+                    compile_commands: bool = False, sort_files: bool = True,
+                    shared_index: scan_index = None, project: Project = None) -> List[Tuple[str, bool]]:
+    # returns [(path of a generated file, whether it was written)]
+    # config_names (or every configuration with all_configs, else the first one) are the only ones parsed
+    # config_layout: 'blocks' (one file selecting by CMAKE_BUILD_TYPE), 'dirs' (<config>/CMakeLists.txt) or
+    # 'fragments' (a stable CMakeLists.txt including <FRAGMENTS_DIR_NAME>/<config>/*.cmake)
+    # shared_index: list the linked folders outside the project from this shared scan_index
+    # project: the already loaded (and cached) Project of PROJECT_DIR
+    preload_configs = config_names or (True if all_configs else None)
+    cache = project_cache(PROJECT_DIR) if use_cache else None
+    if project is not None:
+        cdt_prj = project
+    else:
+        cdt_prj = cache.load_project(preload_configs) if cache else Project(PROJECT_DIR, preload_configs=preload_configs)
+    # streaming without a cache: nothing needs the directory listings afterwards
+    index = cache.load_dir_index() if cache else dir_index(keep_listings=sort_files)
+    outputs = generate_outputs(cdt_prj, index, target_dir, ignore_list, project_dirs, all_configs, config_layout, jobs,
+                               config_names, acceleration, compile_commands, sort_files, shared_index)
+    if cache:
+        if project is None:
+            cache.store_project(cdt_prj)
+        cache.store_dir_index(index)
+    return outputs
+
+
+def generate_outputs(cdt_prj: Project, index: dir_index, target_dir: str = '.', ignore_list: List[str] = None,
+                     project_dirs: Dict[str, str] = None, all_configs: bool = False, config_layout: str = 'blocks',
+                     jobs: int = None, config_names: List[str] = None,
+                     acceleration: build_acceleration = None, compile_commands: bool = False,
+                     sort_files: bool = True, shared_index: scan_index = None) -> List[Tuple[str, bool]]:
+    # generate (and write when changed) the CMakeLists.txt of an already loaded project, see convert_project;
+    # compile_commands: also a compile_commands.json next to it (of the first configuration in one file);
+    # sort_files=False: stream the scanned files in the order found (see cmake_generator.iter_src_files)
+    if config_names:
+        unknown_names = [config_name for config_name in config_names if config_name not in cdt_prj.configs]
+        if len(unknown_names) > 0:
+            raise ValueError(f"unknown configuration {', '.join(unknown_names)} "
+                             f"(available: {', '.join(cdt_prj.configs.keys())})")
+    elif all_configs:
+        config_names = list(cdt_prj.configs.keys())
+    else:
+        config_names = list(cdt_prj.configs.keys())[:1]
+    cdt_prj.configs.load(config_names)
+
+    def new_generator(gen_target_dir):
         generator = cmake_generator(cdt_prj)
-        generator.generate(config_name, outfile)
-        break
+        generator.set_gen_target_dir(gen_target_dir)
+        generator.set_ignore_list(ignore_list)
+        generator.set_dir_index(index)
+        generator.set_build_acceleration(acceleration)
+        generator.set_sort_files(sort_files)
+        generator.set_shared_index(shared_index)
+        if project_dirs is not None:
+            generator.set_project_dirs(project_dirs)
+        generator.set_config_subdirs(config_layout == 'dirs')
+        return generator
+
+    # generate, written to the output file as it is rendered
+    outputs = []
+    if config_layout == 'dirs':
+        # a referenced project is added from its own <config>/CMakeLists.txt of the same configuration
+        for project_name, project_dir in new_generator(target_dir).get_referenced_project_dirs():
+            referenced_names = read_config_names(project_dir)
+            missing_names = [config_name for config_name in config_names if config_name not in referenced_names]
+            if len(missing_names) > 0:
+                raise ValueError(f"--config-layout dirs: referenced project {project_name} has no configuration "
+                                 f"{', '.join(missing_names)}")
+        if jobs == 1 or len(config_names) < 2 or not sort_files:
+            for config_name in config_names:
+                config_dir = os.path.join(target_dir, config_name)
+                os.makedirs(config_dir, exist_ok=True)
+                generator = new_generator(config_dir)
+                outfile_path = os.path.join(config_dir, cmake_generator.target_filename)
+                outputs.append((outfile_path, write_stream_if_changed(
+                    outfile_path, lambda outfile: generator.generate(config_name, outfile))))
+                if compile_commands:
+                    outputs.append(write_compile_commands(generator, config_name))
+        else:
+            # rendered concurrently, each one in memory until written
+            def render(config_name):
+                config_dir = os.path.join(target_dir, config_name)
+                outfile = io.StringIO()
+                generator = new_generator(config_dir)
+                generator.generate(config_name, outfile)
+                return config_dir, outfile.getvalue(), generator
+
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                rendered = list(executor.map(render, config_names))
+            for (config_dir, content, generator), config_name in zip(rendered, config_names):
+                os.makedirs(config_dir, exist_ok=True)
+                outfile_path = os.path.join(config_dir, cmake_generator.target_filename)
+                outputs.append((outfile_path, write_if_changed(outfile_path, content)))
+                if compile_commands:
+                    outputs.append(write_compile_commands(generator, config_name))
+    elif config_layout == 'fragments':
+        generator = new_generator(target_dir)
+        outputs += write_fragments(generator, config_names, jobs)
+        if compile_commands:
+            outputs.append(write_compile_commands(generator, config_names[0]))
+    else:
+        generator = new_generator(target_dir)
+        if len(config_names) == 1:
+            def generate(outfile):
+                generator.generate(config_names[0], outfile)
+        else:
+            def generate(outfile):
+                generator.generate_all(config_names, outfile, jobs)
+        outfile_path = os.path.join(target_dir, cmake_generator.target_filename)
+        outputs.append((outfile_path, write_stream_if_changed(outfile_path, generate)))
+        if compile_commands:
+            outputs.append(write_compile_commands(generator, config_names[0]))
+    return outputs
+
+
+def write_fragments(generator: cmake_generator, config_names: List[str], jobs: int = None) -> List[Tuple[str, bool]]:
+    # the fragments of every configuration, rendered concurrently on top of the shared scan, and the
+    # CMakeLists.txt including them; each file is only written when its own content changed
+    if jobs == 1 or len(config_names) < 2:
+        rendered = [generator.render_fragments(config_name) for config_name in config_names]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            rendered = list(executor.map(generator.render_fragments, config_names))
+
+    outputs = []
+    for config_name, fragments in zip(config_names, rendered):
+        fragments_dir = os.path.join(generator.target_dir, FRAGMENTS_DIR_NAME, config_name)
+        os.makedirs(fragments_dir, exist_ok=True)
+        for section in FRAGMENT_SECTIONS:
+            outfile_path = os.path.join(fragments_dir, f'{section}.cmake')
+            outputs.append((outfile_path, write_if_changed(outfile_path, fragments[section])))
+    outfile_path = os.path.join(generator.target_dir, cmake_generator.target_filename)
+    outputs.append((outfile_path, write_stream_if_changed(outfile_path,
+                                                          lambda outfile: generator.generate_fragmented(config_names, outfile))))
+    remove_stale_fragments(os.path.join(generator.target_dir, FRAGMENTS_DIR_NAME), config_names)
+    return outputs
+
+
+def remove_stale_fragments(fragments_root: str, config_names: List[str]) -> None:
+    # remove the fragment directories of configurations that are no longer generated; a directory holding
+    # anything but fragment files is left alone
+    fragment_files = set(f'{section}.cmake' for section in FRAGMENT_SECTIONS)
+    try:
+        entries = list(os.scandir(fragments_root))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name in config_names or not entry.is_dir(follow_symlinks=False):
+            continue
+        try:
+            file_names = os.listdir(entry.path)
+            if not set(file_names) <= fragment_files:
+                continue
+            for file_name in file_names:
+                os.remove(os.path.join(entry.path, file_name))
+            os.rmdir(entry.path)
+        except OSError as e:
+            print(f"WARNING {entry.path}: {e}", file=sys.stderr)
+
+
+def write_compile_commands(generator: cmake_generator, config_name: str) -> Tuple[str, bool]:
+    outfile_path = os.path.join(generator.target_dir, COMPILE_COMMANDS_FILENAME)
+    return outfile_path, write_stream_if_changed(outfile_path,
+                                                 lambda outfile: generator.generate_compile_commands(config_name, outfile))
+
+
+def load_project(PROJECT_DIR: str, WORKSPACE_DIR: str = None, config_names: List[str] = None) -> Project:
+    # public API: the model of the CDT project in PROJECT_DIR; config_names (default: the first configuration)
+    # are parsed now, the other configurations when first used
+    return Project(PROJECT_DIR, WORKSPACE_DIR, config_names or None)
+
+
+def render_cmake(project: Project, config=None, target_dir: str = '.', ignore_list: List[str] = None,
+                 project_dirs: Dict[str, str] = None, index: dir_index = None,
+                 acceleration: build_acceleration = None) -> str:
+    # public API: the CMakeLists.txt for target_dir of a configuration (its name or Configuration, default: the
+    # first one); pass the same dir_index to several calls to list every directory only once
+    config_name = _get_config_name(project, config)
+    generator = cmake_generator(project)
+    generator.set_gen_target_dir(target_dir)
+    generator.set_ignore_list(ignore_list)
+    generator.set_build_acceleration(acceleration)
+    if index is not None:
+        generator.set_dir_index(index)
+    if project_dirs is not None:
+        generator.set_project_dirs(project_dirs)
+    outfile = io.StringIO()
+    generator.generate(config_name, outfile)
+    return outfile.getvalue()
+
+
+def render_compile_commands(project: Project, outfile, config=None, target_dir: str = '.',
+                            ignore_list: List[str] = None, index: dir_index = None) -> None:
+    # public API: stream the compile_commands.json of a configuration (see render_cmake) to outfile; the
+    # compiles run in target_dir
+    config_name = _get_config_name(project, config)
+    generator = cmake_generator(project)
+    generator.set_gen_target_dir(target_dir)
+    generator.set_ignore_list(ignore_list)
+    if index is not None:
+        generator.set_dir_index(index)
+    generator.generate_compile_commands(config_name, outfile)
+
+
+def _get_config_name(project: Project, config) -> str:
+    if config is None:
+        config_name = next(iter(project.configs))
+    elif isinstance(config, Configuration):
+        config_name = config.name
+    else:
+        config_name = config
+    if config_name not in project.configs:
+        raise ValueError(f"unknown configuration {config_name} (available: {', '.join(project.configs.keys())})")
+    return config_name
+
+
+class inotify_watch:
+    # directory watches with the Linux inotify API (through ctypes); create() returns None where unavailable
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+                  | IN_ONLYDIR)
+
+    def __init__(self, libc, fd: int):
+        self.libc = libc
+        self.fd = fd
+        self.paths = {}  # watch descriptor -> directory path
+        self.wds = {}    # directory path -> watch descriptor
+
+    @classmethod
+    def create(cls) -> 'inotify_watch':
+        if not sys.platform.startswith('linux'):
+            return None
+        import ctypes
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(cls.IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def add(self, path: str) -> bool:
+        if path in self.wds:
+            return True
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            return False  # removed meanwhile, or out of watches (fs.inotify.max_user_watches)
+        self.paths[wd] = path
+        self.wds[path] = wd
+        return True
+
+    def remove(self, path: str) -> None:
+        wd = self.wds.pop(path, None)
+        if wd is not None:
+            del self.paths[wd]
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float = None) -> List[Tuple[str, str, int]]:
+        # [(directory path, name, event mask)] or None when the kernel queue overflowed (events were lost)
+        import select
+        import struct
+        if len(select.select([self.fd], [], [], timeout)[0]) == 0:
+            return []
+        buffer = os.read(self.fd, 256 * 1024)
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, cookie, name_len = struct.unpack_from('iIII', buffer, offset)
+            name = os.fsdecode(buffer[offset + 16:offset + 16 + name_len].split(b'\0', 1)[0])
+            offset += 16 + name_len
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            path = self.paths.get(wd)
+            if path is None:
+                continue
+            if mask & self.IN_IGNORED:
+                # watch removed by the kernel: the directory is gone
+                del self.paths[wd]
+                self.wds.pop(path, None)
+            events.append((path, name, mask))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class project_watcher:
+    # --watch: keeps the Project and the directory listings in memory and regenerates CMakeLists.txt when
+    # .project/.cproject or a scanned directory changes, with inotify (or by polling directory mtimes)
+    DEBOUNCE = 0.1       # a burst of events ends after this quiet time (seconds)
+    MAX_DELAY = 0.5      # ... or this long after its first event
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, PROJECT_DIR: str, target_dir: str = '.', ignore_list: List[str] = None, all_configs: bool = False,
+                 config_layout: str = 'blocks', jobs: int = None, config_names: List[str] = None,
+                 acceleration: build_acceleration = None, compile_commands: bool = False, sort_files: bool = True):
+        self.PROJECT_DIR = norm_path(PROJECT_DIR)
+        self.target_dir = target_dir
+        self.ignore_list = ignore_list
+        self.all_configs = all_configs
+        self.config_layout = config_layout
+        self.jobs = jobs
+        self.config_names = config_names
+        self.acceleration = acceleration
+        self.compile_commands = compile_commands
+        self.sort_files = sort_files
+        self.preload_configs = config_names or (True if all_configs else None)
+        self.index = dir_index()
+        self.watch = None
+        self.xml_mtimes = {}
+        self.cdt_prj = None
+
+    def xml_changes(self) -> Set[str]:
+        # names of the project files modified since they were parsed
+        changed = set()
+        for filename in ('.project', '.cproject'):
+            try:
+                mtime_ns = os.stat(os.path.join(self.PROJECT_DIR, filename)).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            if mtime_ns != self.xml_mtimes.get(filename):
+                changed.add(filename)
+            self.xml_mtimes[filename] = mtime_ns
+        return changed
+
+    def load(self, xml_changes: Set[str]) -> None:
+        # only .cproject changed: parse the configurations again and keep the rest of the project
+        if self.cdt_prj is not None and xml_changes == {'.cproject'}:
+            self.cdt_prj.configs, cproject_references = self.cdt_prj._get_configs(self.preload_configs)
+            self.cdt_prj.REFERENCED_PROJECTS = get_project_references(self.cdt_prj._get_project_xml(), cproject_references)
+        else:
+            self.cdt_prj = Project(self.PROJECT_DIR, preload_configs=self.preload_configs)
+
+    def regenerate(self, report_unchanged: bool = False) -> None:
+        started = time.perf_counter()
+        outputs = generate_outputs(self.cdt_prj, self.index, self.target_dir, self.ignore_list, None, self.all_configs,
+                                   self.config_layout, self.jobs, self.config_names, self.acceleration,
+                                   self.compile_commands, self.sort_files)
+        elapsed = time.perf_counter() - started
+        for outfile_path, written in outputs:
+            if written or report_unchanged:
+                print(f"[{time.strftime('%H:%M:%S')}] {outfile_path}: {'written' if written else 'unchanged'} ({elapsed:.3f} s)")
+        sys.stdout.flush()
+
+    def watch_dirs(self) -> List[str]:
+        # watch every directory listed by the last scan; returns the ones changed before their watch existed
+        if self.watch is None:
+            return []
+        changed_dirs = []
+        for path in [self.PROJECT_DIR] + list(self.index.entries.keys()):
+            if path in self.watch.wds:
+                continue
+            if not self.watch.add(path):
+                if os.path.isdir(path):
+                    print(f"inotify watch failed for {path}, polling instead")
+                    self.watch.close()
+                    self.watch = None
+                    return []
+                continue
+            cached = self.index.entries.get(path)
+            try:
+                if cached is not None and os.stat(path).st_mtime_ns != cached[0]:
+                    changed_dirs.append(path)
+            except OSError:
+                changed_dirs.append(path)
+        return changed_dirs
+
+    def wait_inotify(self) -> Tuple[Set[str], List[str]]:
+        # (changed project files, changed directories or None for all of them), after a burst of events
+        xml_changes = set()
+        changed_dirs = set()
+        first_event = None
+        while True:
+            if first_event is None:
+                timeout = None
+            else:
+                timeout = min(self.DEBOUNCE, max(0.0, first_event + self.MAX_DELAY - time.monotonic()))
+            events = self.watch.read(timeout)
+            if events is None:
+                return {'.project', '.cproject'}, None
+            if len(events) == 0:
+                if first_event is not None:
+                    return xml_changes, sorted(changed_dirs)
+                continue
+            for path, name, mask in events:
+                if mask & (inotify_watch.IN_DELETE_SELF | inotify_watch.IN_MOVE_SELF | inotify_watch.IN_IGNORED):
+                    self.index.forget(path)
+                    self.watch.remove(path)
+                    changed_dirs.add(os.path.dirname(path))
+                elif path == self.PROJECT_DIR and name in ('.project', '.cproject'):
+                    xml_changes.add(name)
+                elif mask & inotify_watch.IN_ISDIR or name.endswith(SCAN_FILE_EXTS):
+                    changed_dirs.add(path)
+                    if mask & inotify_watch.IN_ISDIR and mask & (inotify_watch.IN_DELETE | inotify_watch.IN_MOVED_FROM):
+                        removed_path = os.path.join(path, name)
+                        self.index.forget(removed_path)
+                        self.watch.remove(removed_path)
+                else:
+                    continue  # not a file the scan keeps (the generated CMakeLists.txt, editor backups, ...)
+                if first_event is None:
+                    first_event = time.monotonic()
+
+    def wait_poll(self) -> Tuple[Set[str], List[str]]:
+        while True:
+            time.sleep(self.POLL_INTERVAL)
+            xml_changes = self.xml_changes()
+            changed_dirs = self.index.changed_dirs()
+            if len(xml_changes) > 0 or len(changed_dirs) > 0:
+                # let the burst settle before reading the project files
+                time.sleep(self.DEBOUNCE)
+                return xml_changes, changed_dirs
+
+    def run(self) -> int:
+        self.load(self.xml_changes())
+        self.watch = inotify_watch.create()
+        if self.watch is not None:
+            self.watch.add(self.PROJECT_DIR)  # before the scan: nothing is missed between scan and watch
+        self.regenerate(True)
+        pending_dirs = self.watch_dirs()
+        print(f"watching {self.PROJECT_DIR} ({'inotify' if self.watch is not None else 'polling'}), Ctrl-C to stop")
+        sys.stdout.flush()
+        try:
+            while True:
+                if len(pending_dirs) > 0:
+                    xml_changes, changed_dirs = set(), pending_dirs
+                elif self.watch is not None:
+                    xml_changes, changed_dirs = self.wait_inotify()
+                else:
+                    xml_changes, changed_dirs = self.wait_poll()
+                try:
+                    if len(xml_changes) > 0:
+                        self.xml_changes()  # remember the mtimes parsed
+                        self.load(xml_changes)
+                    self.index.new_pass(changed_dirs)
+                    self.regenerate()
+                except Exception as e:
+                    # e.g. a .cproject saved half way: keep watching, the next save regenerates
+                    print(f"[{time.strftime('%H:%M:%S')}] FAILED {type(e).__name__}: {e}")
+                    sys.stdout.flush()
+                pending_dirs = self.watch_dirs()
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            if self.watch is not None:
+                self.watch.close()
+
+
+def _load_project_job(PROJECT_DIR: str, use_cache: bool = False, preload_configs=None,
+                      timings: bool = False) -> Tuple[str, Project, str, Dict]:
+    # worker for workspace mode: (PROJECT_DIR, Project or None, error message or None, STATS.as_dict() with timings);
+    # the Project is handed to the conversion job, so every project is parsed once
+    if timings:
+        STATS.reset()
+        STATS.enabled = True
+    try:
+        if use_cache:
+            cache = project_cache(PROJECT_DIR)
+            cdt_prj = cache.load_project(preload_configs)
+            cache.store_project(cdt_prj)
+        else:
+            cdt_prj = Project(PROJECT_DIR, preload_configs=preload_configs)
+    except Exception as e:
+        return PROJECT_DIR, None, f'{type(e).__name__}: {e}', STATS.as_dict() if timings else None
+    return PROJECT_DIR, cdt_prj, None, STATS.as_dict() if timings else None
+
+
+def _convert_project_job(PROJECT_DIR: str, cdt_prj: Project, ignore_list: List[str] = None,
+                         project_dirs: Dict[str, str] = None, use_cache: bool = False,
+                         all_configs: bool = False, config_layout: str = 'blocks',
+                         config_names: List[str] = None, acceleration: build_acceleration = None,
+                         compile_commands: bool = False, sort_files: bool = True,
+                         shared_index: scan_index = None, timings: bool = False) -> Tuple[str, str, bool, Dict]:
+    # worker for workspace mode: (PROJECT_DIR, error message or None, written, STATS.as_dict() with timings)
+    if timings:
+        STATS.reset()
+        STATS.enabled = True
+    try:
+        outputs = convert_project(PROJECT_DIR, PROJECT_DIR, ignore_list, project_dirs, use_cache,
+                                  all_configs, config_layout, 1, config_names, acceleration, compile_commands,
+                                  sort_files, shared_index, cdt_prj)
+    except Exception as e:
+        return PROJECT_DIR, f'{type(e).__name__}: {e}', False, STATS.as_dict() if timings else None
+    return PROJECT_DIR, None, any(written for outfile_path, written in outputs), STATS.as_dict() if timings else None
+
+
+class workspace_graph:
+    def __init__(self, projects: Dict[str, Project]):
+        # projects: directory -> loaded Project
+        self.project_dirs = {}   # project name -> directory
+        self.references = {}     # project name -> referenced project names inside the workspace
+        for project_dir, cdt_prj in projects.items():
+            project_name = cdt_prj.PROJECT_NAME.strip()
+            self.project_dirs[project_name] = project_dir
+            self.references[project_name] = cdt_prj.REFERENCED_PROJECTS
+        for project_name, references in self.references.items():
+            self.references[project_name] = [name for name in references if name in self.project_dirs and name != project_name]
+
+    def waves(self) -> List[List[str]]:
+        # topological levels: every project comes after the projects it references
+        pending = {name: set(references) for name, references in self.references.items()}
+        waves = []
+        while pending:
+            wave = sorted(name for name, references in pending.items() if len(references) == 0)
+            if len(wave) == 0:
+                # reference cycle: convert the rest together
+                wave = sorted(pending.keys())
+                debug_print("** reference cycle between:", wave)
+            for name in wave:
+                del pending[name]
+            for references in pending.values():
+                references.difference_update(wave)
+            waves.append(wave)
+        return waves
+
+
+def convert_workspace(WORKSPACE_DIR: str, jobs: int = None, ignore_list: List[str] = None, use_cache: bool = False,
+                      all_configs: bool = False, config_layout: str = 'blocks', config_names: List[str] = None,
+                      acceleration: build_acceleration = None, compile_commands: bool = False,
+                      sort_files: bool = True, shared_index: scan_index = None) -> int:
+    # shared_index: every project (and worker process) lists the SDK folders it links from it, each directory
+    # validated once per run
+    project_dirs = find_cdt_projects(WORKSPACE_DIR)
+    if len(project_dirs) == 0:
+        print(f"no CDT project found in {WORKSPACE_DIR}")
+        return 1
+
+    preload_configs = config_names or (True if all_configs else None)
+    results = []
+    warnings = []
+
+    def run(submit):
+        # every project is parsed (concurrently) once, then converted in waves of the reference graph
+        projects = {}
+        failed_projects = set()
+        for load in [submit(_load_project_job, project_dir, use_cache, preload_configs) for project_dir in project_dirs]:
+            project_dir, cdt_prj, error, stats = load()
+            if stats is not None:
+                STATS.merge(stats)
+            if error is not None:
+                results.append((project_dir, error, False))
+                failed_projects.add(read_project_name(project_dir))
+            else:
+                projects[project_dir] = cdt_prj
+
+        graph = workspace_graph(projects)
+        for wave in graph.waves():
+            jobs_in_wave = []
+            for project_name in wave:
+                project_dir = graph.project_dirs[project_name]
+                # a project does not need the output of the projects it references: converted anyway
+                failed_references = [name for name in projects[project_dir].REFERENCED_PROJECTS if name in failed_projects]
+                if len(failed_references) > 0:
+                    warnings.append((project_dir, f"referenced project failed: {', '.join(failed_references)}"))
+                jobs_in_wave.append((project_name, submit(_convert_project_job, project_dir, projects.pop(project_dir),
+                                                          ignore_list, graph.project_dirs, use_cache, all_configs,
+                                                          config_layout, config_names, acceleration, compile_commands,
+                                                          sort_files, shared_index)))
+            for project_name, job in jobs_in_wave:
+                project_dir, error, written, stats = job()
+                if error is not None:
+                    failed_projects.add(project_name)
+                if stats is not None:
+                    STATS.merge(stats)
+                results.append((project_dir, error, written))
+
+    if jobs == 1:
+        run(lambda func, *args: functools.partial(func, *args))
+    else:
+        # workers record their own STATS and send them back with the result
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            run(lambda func, *args: executor.submit(func, *args, STATS.enabled).result)
+
+    failures = [(project_dir, error) for project_dir, error, written in results if error is not None]
+    written_count = sum(1 for project_dir, error, written in results if written)
+    for project_dir, error in failures:
+        print(f"FAILED {project_dir}: {error}")
+    for project_dir, warning in warnings:
+        print(f"WARNING {project_dir}: {warning}")
+    print(f"{len(results) - len(failures)} project(s) converted ({written_count} written, "
+          f"{len(results) - len(failures) - written_count} unchanged), {len(failures)} failed")
+    return 1 if len(failures) > 0 else 0
+
+
+def main() -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate CMakeLists.txt from an Eclipse CDT (CCS) project.')
+    parser.add_argument('project_dir', nargs='?', default='.', help='CDT project directory (default: .)')
+    parser.add_argument('--workspace', metavar='DIR',
+                        help='convert every CDT project below DIR, writing each CMakeLists.txt next to its project')
+    parser.add_argument('-j', '--jobs', type=int, default=None, metavar='N',
+                        help='number of worker processes for --workspace, or render threads for --all-configs (default: CPU count)')
+    parser.add_argument('--config', action='append', default=[], metavar='NAME', dest='config_names',
+                        help='generate (and parse) only this build configuration, may be repeated')
+    parser.add_argument('--all-configs', action='store_true',
+                        help='generate every build configuration instead of only the first one')
+    parser.add_argument('--config-layout', choices=('blocks', 'dirs', 'fragments'), default='blocks',
+                        help='with several configurations: one CMakeLists.txt selecting the configuration by CMAKE_BUILD_TYPE (blocks), '
+                             'or one <config>/CMakeLists.txt per configuration (dirs, adding referenced projects from their '
+                             '<config>/CMakeLists.txt); fragments: a CMakeLists.txt that rarely '
+                             f'changes including {FRAGMENTS_DIR_NAME}/<config>/<section>.cmake files, each one only rewritten '
+                             'when its content changed')
+    parser.add_argument('--ignore', action='append', default=[], metavar='DIR',
+                        help='directory name (or project relative path) to skip while scanning, may be repeated (only the '
+                             'build output folder of the generated configuration is skipped by default)')
+    parser.add_argument('--cache', action='store_true',
+                        help=f'reuse the parsed project and directory listings from {project_cache.CACHE_DIR_NAME}/ when unchanged '
+                             '(the cache directory must be trusted: its files are unpickled)')
+    parser.add_argument('--scan-index', nargs='?', const='', default=None, metavar='DIR',
+                        help='share the directory listings of linked folders outside the project (SDKs) between projects '
+                             f'and runs, in DIR (default: {default_scan_index_dir()}, which must be trusted: its files are '
+                             'unpickled)')
+    parser.add_argument('--unity-build', type=int, nargs='?', const=8, default=None, metavar='BATCH',
+                        help='generate UNITY_BUILD targets batching BATCH C/C++ sources (default: 8); '
+                             '.asm, .cla and .cmd files are never batched')
+    parser.add_argument('--unity-group-by-dir', action='store_true',
+                        help='with --unity-build: only batch sources of the same directory together')
+    parser.add_argument('--ccache', action='store_true',
+                        help='use ccache as compiler launcher when found (non-TI toolchains)')
+    parser.add_argument('--pch', action='append', default=[], metavar='HEADER',
+                        help='precompile HEADER (project relative, or <system header>) for non-TI toolchains, may be repeated')
+    parser.add_argument('--link-pool', action='store_true',
+                        help='serialize the links of TI targets in a Ninja job pool while compiles run in parallel')
+    parser.add_argument('--compile-commands', action='store_true',
+                        help=f'also write {COMPILE_COMMANDS_FILENAME} straight from the project (no CMake configure), '
+                             'for the first configuration (or per configuration with --config-layout dirs)')
+    parser.add_argument('--no-sort', action='store_false', dest='sort_files',
+                        help='write the scanned files in the order found instead of sorted, streaming them from the scan '
+                             'to the output (for huge source trees, the output order then depends on the file system)')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and regenerate when .project, .cproject or the scanned directories change')
+    parser.add_argument('--timings', action='store_true',
+                        help='print the time spent per phase and the scan/expansion counters to stderr')
+    parser.add_argument('--timings-json', metavar='FILE',
+                        help='write the timings and counters as JSON to FILE (- for stdout)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='run under cProfile and write the stats to FILE (only the main process with --workspace)')
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    args = parser.parse_args()
+
+    STATS.enabled = args.timings or args.timings_json is not None
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    started = time.perf_counter()
+    try:
+        return run(parser, args)
+    finally:
+        STATS.wall_time = time.perf_counter() - started
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if args.timings:
+            STATS.report(sys.stderr)
+        if args.timings_json is not None:
+            import json
+            if args.timings_json == '-':
+                json.dump(STATS.as_dict(), sys.stdout, indent=2)
+                sys.stdout.write('\n')
+            else:
+                with open(args.timings_json, 'w') as f:
+                    json.dump(STATS.as_dict(), f, indent=2)
+
+
+def run(parser, args) -> int:
+    if args.watch and (args.workspace or args.cache or args.scan_index is not None):
+        parser.error('--watch cannot be combined with --workspace, --cache or --scan-index')
+    if args.unity_build is not None and args.unity_build < 1:
+        parser.error('--unity-build batch size must be at least 1')
+    if args.unity_group_by_dir and args.unity_build is None:
+        parser.error('--unity-group-by-dir requires --unity-build')
+    acceleration = build_acceleration(args.unity_build, args.unity_group_by_dir, args.ccache, args.pch, args.link_pool)
+    shared_index = open_scan_index(args.scan_index or None) if args.scan_index is not None else None
+    if args.workspace:
+        return convert_workspace(args.workspace, args.jobs, args.ignore, args.cache, args.all_configs, args.config_layout,
+                                 args.config_names, acceleration, args.compile_commands, args.sort_files, shared_index)
+
+    PROJECT_DIR = args.project_dir or "."
+    if args.watch:
+        watcher = project_watcher(PROJECT_DIR, '.', args.ignore, args.all_configs, args.config_layout, args.jobs,
+                                  args.config_names, acceleration, args.compile_commands, args.sort_files)
+        try:
+            return watcher.run()
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        outputs = convert_project(PROJECT_DIR, '.', args.ignore, use_cache=args.cache,
+                                  all_configs=args.all_configs, config_layout=args.config_layout, jobs=args.jobs,
+                                  config_names=args.config_names, acceleration=acceleration,
+                                  compile_commands=args.compile_commands, sort_files=args.sort_files,
+                                  shared_index=shared_index)
+    except ValueError as e:
+        parser.error(str(e))
+    for outfile_path, written in outputs:
+        print(f"{outfile_path}: {'written' if written else 'unchanged'}")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())